@@ -11,10 +11,13 @@ What it does
     1. Parses ``src/command.cpp`` for command registrations of the form
        ``t.emplace("COMMAND_NAME", ...)``, extracting all uppercase command
        names (e.g. SET, HGETALL, XADD).
-    2. Reads every file under ``tests/`` (binary-safe; decoding errors are
-       suppressed) and concatenates their text.
-    3. For each extracted command name, searches for a whole-word match
-       (\bCOMMAND_NAME\b) in the concatenated test text.
+    2. Compiles all extracted command names into a single whole-word
+       alternation (\b(SET|HGETALL|...)\b).
+    3. Walks ``tests/`` with ``os.scandir`` and reads every plausible test
+       source (by suffix, up to 16 MiB; see ``SOURCE_SUFFIXES``) as raw bytes
+       on a small thread pool, scanning each one with that pattern (command
+       names are ASCII, so no text decoding is needed) and collecting every command name that
+       matches.  The walk stops early once every command has been seen.
     4. Reports any command names that have NO match at all.
 
 How to run
@@ -49,30 +52,85 @@ Notes / limitations
       proof of thorough coverage.
     - Only uppercase [A-Z0-9_]+ names registered via t.emplace(...) are
       considered.
+    - Files with other suffixes (binaries, fixtures, caches) and files larger
+      than 16 MiB are not scanned.
 """
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+import os
 import pathlib
 import re
 import sys
 
 ROOT = pathlib.Path(__file__).resolve().parents[2]
+READ_WORKERS = 16
+MAX_FILE_BYTES = 16 << 20
+SOURCE_SUFFIXES = frozenset({
+    '.py', '.tcl', '.sh', '.md', '.c', '.cpp', '.h', '.hpp',
+    '.txt', '.json', '.yaml', '.yml', '.conf', '.lua',
+})
+
+
+def _iter_files(top: str):
+    stack = [top]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    if os.path.splitext(entry.name)[1].lower() not in SOURCE_SUFFIXES:
+                        continue
+                    if entry.stat().st_size > MAX_FILE_BYTES:
+                        continue
+                    yield entry.path
+
+
+_EMPLACE = b't.emplace("'
+_NAME_BYTES = frozenset(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_')
+
+
+def _registered_commands(src: bytes) -> set[bytes]:
+    """Return every NAME registered as ``t.emplace("NAME"`` in ``src``."""
+    commands = set()
+    i = src.find(_EMPLACE)
+    while i >= 0:
+        start = end = i + len(_EMPLACE)
+        while end < len(src) and src[end] in _NAME_BYTES:
+            end += 1
+        if end > start and src[end:end + 1] == b'"':
+            commands.add(src[start:end])
+        i = src.find(_EMPLACE, end)
+    return commands
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
 
 
 def main() -> int:
-    cmd_src = (ROOT / 'src/command.cpp').read_text(encoding='utf-8', errors='ignore')
-    commands = sorted(set(re.findall(r't\.emplace\("([A-Z0-9_]+)"', cmd_src)))
-
-    texts = []
-    for p in ROOT.joinpath('tests').rglob('*'):
-        if p.is_file():
-            texts.append(p.read_text(encoding='utf-8', errors='ignore'))
-    all_text = '\n'.join(texts)
-
-    missing = []
-    for c in commands:
-        if re.search(r'\b' + re.escape(c) + r'\b', all_text) is None:
-            missing.append(c)
+    commands = sorted(_registered_commands(_read_bytes(str(ROOT / 'src/command.cpp'))))
+
+    # One pattern for all commands.  Longest names first so shared prefixes
+    # (HGET / HGETALL) resolve without backtracking.
+    names = sorted(commands, key=len, reverse=True)
+    pattern = re.compile(rb'\b(' + b'|'.join(map(re.escape, names)) + rb')\b')
+
+    # File reads release the GIL, so a thread pool keeps several reads in
+    # flight while the main thread runs the matcher.
+    found: set[bytes] = set()
+    files = list(_iter_files(str(ROOT / 'tests')))
+    ex = ThreadPoolExecutor(max_workers=READ_WORKERS)
+    try:
+        for data in ex.map(_read_bytes, files):
+            found.update(pattern.findall(data))
+            if len(found) == len(commands):
+                break
+    finally:
+        ex.shutdown(cancel_futures=True)
+    missing = [c.decode('ascii') for c in commands if c not in found]
 
     if missing:
         print('Missing test references for commands:')
@@ -55,6 +55,27 @@ import pathlib
 import re
 import sys
 
+SECTION_SPLIT_RE = re.compile(r"\n(?=\d+\.\s)")
+SECTION_HEADER_RE = re.compile(r"^\d+\.\s")
+REQUIRED_FIELDS = ("- Status:", "- Owner:", "- Severity:", "- Target milestone:", "- Implemented:", "- Missing:")
+
+
+def present_fields(section: str) -> int:
+    """Return a bitmask of the REQUIRED_FIELDS found in ``section``.
+
+    Every required field starts with ``"- "``, so a single left-to-right scan
+    over the bullet markers finds all of them in one pass.
+    """
+    present = 0
+    pos = section.find("- ")
+    while pos >= 0:
+        for bit, field in enumerate(REQUIRED_FIELDS):
+            if section.startswith(field, pos):
+                present |= 1 << bit
+                break
+        pos = section.find("- ", pos + 2)
+    return present
+
 
 def main() -> int:
     root = pathlib.Path(__file__).resolve().parents[2]
@@ -62,18 +83,18 @@ def main() -> int:
     txt = path.read_text(encoding="utf-8")
 
     # Split into numbered sections ("1. ", "2. ", ...).
-    parts = re.split(r"\n(?=\d+\.\s)", txt)
-    sections = [p for p in parts if re.match(r"^\d+\.\s", p.strip())]
+    parts = SECTION_SPLIT_RE.split(txt)
+    sections = [p for p in parts if SECTION_HEADER_RE.match(p.strip())]
     if not sections:
         print("No compatibility delta entries found", file=sys.stderr)
         return 1
 
-    required = ["- Status:", "- Owner:", "- Severity:", "- Target milestone:", "- Implemented:", "- Missing:"]
     errors = []
     for s in sections:
         header = s.strip().splitlines()[0]
-        for field in required:
-            if field not in s:
+        present = present_fields(s)
+        for bit, field in enumerate(REQUIRED_FIELDS):
+            if not present & (1 << bit):
                 errors.append(f"{header}: missing field {field}")
 
     if errors:
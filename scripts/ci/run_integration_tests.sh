@@ -15,14 +15,16 @@
 #   3. On failure, captures the last 3 lines of stdout/stderr for quick
 #      triage and marks the test as FAIL (distinguishing timeouts from
 #      other errors).
+#      With JOBS > 1, up to JOBS test files run at once; results are still
+#      reported in file order.
 #   4. After all tests, prints a summary:  PASSED: N / FAILED: M.
 #
 # How it works
 #   - Uses GNU coreutils `timeout` if available; on macOS it also checks
 #     for `gtimeout` (from Homebrew coreutils).  If neither is found, tests
 #     run without a timeout guard.
-#   - Each test's combined stdout+stderr is written to a temp file, which
-#     is automatically cleaned up on exit.
+#   - Each test's combined stdout+stderr and exit code are written to a temp
+#     directory, which is automatically cleaned up on exit.
 #
 # How to run
 #   From the repo root:
@@ -33,6 +35,14 @@
 #
 #       TIMEOUT_SECS=60 scripts/ci/run_integration_tests.sh
 #
+#   Run test files in parallel shards (e.g. cores - 2):
+#
+#       JOBS=$(( $(nproc) - 2 )) scripts/ci/run_integration_tests.sh
+#
+#   Reuse one server across the tests that support it:
+#
+#       SHARED_SERVER=1 scripts/ci/run_integration_tests.sh
+#
 # Prerequisites
 #   - `python3` in PATH.
 #   - A running `peadb-server` instance (most integration tests connect to
@@ -42,6 +52,12 @@
 # Configuration (env vars)
 #   TIMEOUT_SECS   Per-test timeout in seconds (default: 30).  Applies only
 #                  when `timeout`/`gtimeout` is available.
+#   JOBS           Test files to run concurrently (default: 1).  Every test
+#                  takes its ports from _respio.free_port(), so none collide.
+#   SHARED_SERVER  Set to 1 to boot one peadb-server (PEADB_BIN, default
+#                  ./peadb-server) and point every test that starts its
+#                  server through tests/integration/_respio.py at it instead
+#                  of a fresh one.  Forces JOBS=1, since those tests FLUSHALL.
 #
 # Interpreting the output
 #   Each failing test produces a block like:
@@ -64,6 +80,8 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 ROOT_DIR="$(cd "$SCRIPT_DIR/../.." && pwd)"
 
 TIMEOUT_SECS="${TIMEOUT_SECS:-30}"
+JOBS="${JOBS:-1}"
+SHARED_SERVER="${SHARED_SERVER:-0}"
 
 TIMEOUT_CMD=""
 if command -v timeout >/dev/null 2>&1; then
@@ -77,8 +95,8 @@ failed=0
 fail_list=""
 
 shopt -s nullglob
-out_file="$(mktemp -t peadb_test_out.XXXXXX)"
-trap 'rm -f "$out_file"' EXIT
+out_dir="$(mktemp -d -t peadb_test_out.XXXXXX)"
+trap 'rm -rf "$out_dir"' EXIT
 
 cd "$ROOT_DIR"
 
@@ -88,30 +106,65 @@ if [[ ${#tests[@]} -eq 0 ]]; then
   exit 1
 fi
 
-for t in "${tests[@]}"; do
+server_pid=""
+if [[ "$SHARED_SERVER" == "1" ]]; then
+  # One server for every test that starts its server through
+  # tests/integration/_respio.py; they FLUSHALL it, so run them one at a time.
+  JOBS=1
+  PEADB_BIN="${PEADB_BIN:-$ROOT_DIR/peadb-server}"
+  PEADB_SHARED_PORT=$(python3 -c 'import socket; s = socket.socket(); s.bind(("127.0.0.1", 0)); print(s.getsockname()[1])')
+  "$PEADB_BIN" --port "$PEADB_SHARED_PORT" --bind 127.0.0.1 --loglevel error &
+  server_pid=$!
+  trap 'rm -rf "$out_dir"; kill "$server_pid" 2>/dev/null || true' EXIT
+  for _ in $(seq 1 100); do
+    (exec 3<>"/dev/tcp/127.0.0.1/$PEADB_SHARED_PORT") 2>/dev/null && break
+    sleep 0.02
+  done
+  export PEADB_SHARED_PORT
+fi
+
+# Run one test, leaving its output in <name>.out and exit code in <name>.rc.
+run_one() {
+  local t="$1" name code=0
   name=$(basename "$t" .py)
   if [[ -n "$TIMEOUT_CMD" ]]; then
-    if "$TIMEOUT_CMD" "$TIMEOUT_SECS" python3 "$t" > "$out_file" 2>&1; then
-      passed=$((passed + 1))
-    else
-      code=$?
-      failed=$((failed + 1))
-      msg=$(tail -3 "$out_file" || true)
-      if [[ "$code" -eq 124 ]]; then
-        fail_list="${fail_list}FAIL: ${name} (timeout after ${TIMEOUT_SECS}s)\n${msg}\n---\n"
-      else
-        fail_list="${fail_list}FAIL: ${name} (exit ${code})\n${msg}\n---\n"
-      fi
-    fi
+    "$TIMEOUT_CMD" "$TIMEOUT_SECS" python3 "$t" > "$out_dir/$name.out" 2>&1 || code=$?
+  else
+    python3 "$t" > "$out_dir/$name.out" 2>&1 || code=$?
+  fi
+  echo "$code" > "$out_dir/$name.rc"
+}
+
+pids=()
+for t in "${tests[@]}"; do
+  if [[ "$JOBS" -le 1 ]]; then
+    run_one "$t"
+  else
+    while [[ $(jobs -rp | wc -l) -ge "$JOBS" ]]; do
+      sleep 0.05
+    done
+    run_one "$t" &
+    pids+=("$!")
+  fi
+done
+# Only the test jobs: a shared server is a background job too.
+if [[ ${#pids[@]} -gt 0 ]]; then
+  wait "${pids[@]}"
+fi
+
+for t in "${tests[@]}"; do
+  name=$(basename "$t" .py)
+  code=$(cat "$out_dir/$name.rc")
+  if [[ "$code" -eq 0 ]]; then
+    passed=$((passed + 1))
+    continue
+  fi
+  failed=$((failed + 1))
+  msg=$(tail -3 "$out_dir/$name.out" || true)
+  if [[ -n "$TIMEOUT_CMD" && "$code" -eq 124 ]]; then
+    fail_list="${fail_list}FAIL: ${name} (timeout after ${TIMEOUT_SECS}s)\n${msg}\n---\n"
   else
-    if python3 "$t" > "$out_file" 2>&1; then
-      passed=$((passed + 1))
-    else
-      code=$?
-      failed=$((failed + 1))
-      msg=$(tail -3 "$out_file" || true)
-      fail_list="${fail_list}FAIL: ${name} (exit ${code})\n${msg}\n---\n"
-    fi
+    fail_list="${fail_list}FAIL: ${name} (exit ${code})\n${msg}\n---\n"
   fi
 done
 
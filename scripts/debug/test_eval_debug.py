@@ -52,81 +52,94 @@ Exit codes
     Non-zero   Connection error, timeout, or other unhandled exception.
 
 Limitations
-    - The HELLO reply draining uses a fixed 0.5 s sleep + non-blocking
-      recv loop, which is fragile for slow or remote servers.
+    - Replies are framed by a minimal RESP3 walker (``read_frame``) that
+      understands lengths and aggregate counts but does not decode values;
+      it prints exactly the bytes of each reply.
     - Host and port are hardcoded; there is no CLI interface.
 """
 import socket
 import sys
-import time
 
 
-def rx(s, n):
-    b = b""
-    while len(b) < n:
-        c = s.recv(n - len(b))
-        if not c:
-            raise RuntimeError("closed")
-        b += c
+READ_BUFFER = 1 << 16
+# Child values per announced element for RESP3 aggregate types.
+AGGREGATE_WIDTH = {b"*": 1, b"~": 1, b">": 1, b"%": 2, b"|": 2}
+# RESP3 types whose header line is followed by a length-prefixed body.
+BLOB_TYPES = (b"$", b"=", b"!")
+
+
+def rx(f, n):
+    b = f.read(n)
+    if len(b) < n:
+        raise RuntimeError("closed")
     return b
 
 
-def rl(s):
-    b = b""
-    while not b.endswith(b"\r\n"):
-        b += rx(s, 1)
+def rl(f):
+    b = f.readline()
+    if not b.endswith(b"\r\n"):
+        raise RuntimeError("closed")
     return b[:-2]
 
 
+def read_frame(f):
+    """Return the raw bytes of exactly one RESP3 reply (attributes included)."""
+    parts = []
+    pending = 1
+    while pending:
+        line = rl(f)
+        parts.append(line + b"\r\n")
+        pending -= 1
+        prefix = line[:1]
+        if prefix in BLOB_TYPES:
+            n = int(line[1:])
+            if n >= 0:
+                parts.append(rx(f, n + 2))
+        elif prefix in AGGREGATE_WIDTH:
+            n = int(line[1:])
+            if n > 0:
+                pending += AGGREGATE_WIDTH[prefix] * n
+            if prefix == b"|":
+                # An attribute map is followed by the reply it annotates.
+                pending += 1
+    return b"".join(parts)
+
+
 def enc(*args):
-    d = f"*{len(args)}\r\n".encode()
+    out = [b"*%d\r\n" % len(args)]
     for a in args:
         b = a.encode()
-        d += f"${len(b)}\r\n".encode() + b + b"\r\n"
-    return d
+        out += (b"$%d\r\n" % len(b), b, b"\r\n")
+    return b"".join(out)
+
+
+def _sock(port, timeout=2):
+    """Connect to 127.0.0.1:``port`` with Nagle disabled for small frames."""
+    s = socket.create_connection(("127.0.0.1", port), timeout=timeout)
+    s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return s
 
 
 def main() -> int:
-    s = socket.create_connection(("127.0.0.1", 6599), timeout=2)
+    s = _sock(6599)
     s.settimeout(2)
+    f = s.makefile("rb", buffering=READ_BUFFER)
 
-    # Switch to RESP3
+    # Switch to RESP3 and consume the whole HELLO map
     s.sendall(enc("HELLO", "3"))
-    # Read HELLO reply
-    raw = b""
-    while True:
-        raw += s.recv(4096)
-        if b"\r\n" in raw:
-            break
+    raw = read_frame(f)
     print("HELLO reply starts:", repr(raw[:40]))
 
-    # Drain the hello reply fully
-    time.sleep(0.5)
-    try:
-        while True:
-            s.settimeout(0.2)
-            more = s.recv(4096)
-            if not more:
-                break
-            raw += more
-    except Exception:
-        pass
-    s.settimeout(2)
-
     # Enable debug scripts
     s.sendall(enc("DEBUG", "SET-DISABLE-DENY-SCRIPTS", "1"))
-    resp = b""
-    while not resp.endswith(b"\r\n"):
-        resp += rx(s, 1)
+    resp = read_frame(f)
     print("DEBUG:", repr(resp))
 
     # Test attrib
     script = "redis.setresp(3);return redis.call('debug', 'protocol', 'attrib')"
     s.sendall(enc("EVAL", script, "0"))
 
-    # Read raw
-    time.sleep(0.5)
-    raw = s.recv(4096)
+    raw = read_frame(f)
     print("RAW attrib response:", repr(raw))
 
     s.close()
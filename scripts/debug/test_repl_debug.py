@@ -68,98 +68,130 @@ import time
 ROOT = pathlib.Path(__file__).resolve().parents[2]
 
 
-def rx(s, n):
-    b = b""
-    while len(b) < n:
-        c = s.recv(n - len(b))
-        if not c:
-            raise RuntimeError("closed")
-        b += c
+READ_BUFFER = 1 << 16
+
+
+def rx(f, n):
+    b = f.read(n)
+    if len(b) < n:
+        raise RuntimeError("closed")
     return b
 
 
-def rl(s):
-    b = b""
-    while not b.endswith(b"\r\n"):
-        b += rx(s, 1)
+def rl(f):
+    b = f.readline()
+    if not b.endswith(b"\r\n"):
+        raise RuntimeError("closed")
     return b[:-2]
 
 
-def recv(s):
-    p = rx(s, 1)
+def recv(f):
+    p = rx(f, 1)
     if p == b"+":
-        return rl(s).decode()
+        return rl(f).decode()
     if p == b"-":
-        return ("ERR", rl(s).decode())
+        return ("ERR", rl(f).decode())
     if p == b":":
-        return int(rl(s))
+        return int(rl(f))
     if p == b"$":
-        n = int(rl(s))
+        n = int(rl(f))
         if n == -1:
             return None
-        v = rx(s, n)
-        rx(s, 2)
+        v = rx(f, n)
+        rx(f, 2)
         return v.decode()
     if p == b"*":
-        n = int(rl(s))
+        n = int(rl(f))
         if n == -1:
             return None
-        return [recv(s) for _ in range(n)]
+        return [recv(f) for _ in range(n)]
     raise RuntimeError(f"unexpected: {p}")
 
 
 def enc(*a):
-    d = f"*{len(a)}\r\n".encode()
+    out = [b"*%d\r\n" % len(a)]
     for x in a:
         b = x.encode()
-        d += f"${len(b)}\r\n".encode() + b + b"\r\n"
-    return d
+        out += (b"$%d\r\n" % len(b), b, b"\r\n")
+    return b"".join(out)
 
 
-def cmd(s, *a):
+def cmd(s, f, *a):
     s.sendall(enc(*a))
-    return recv(s)
+    return recv(f)
+
+
+def read_payload(f):
+    """Read the length line, body and CRLF of a bulk whose ``$`` was consumed."""
+    n = int(rl(f))
+    d = rx(f, n + 2)
+    return d[:-2].decode()
+
+
+def read_bulk(f):
+    if rx(f, 1) != b"$":
+        raise RuntimeError("repl expected bulk string")
+    return read_payload(f)
 
 
-def repl_cmd(s):
-    p = rx(s, 1)
+def repl_cmd(f):
+    """Read one event off the replication stream.
+
+    The stream is a single continuous RESP feed, so everything is sliced
+    out of the buffered reader ``f`` rather than read from the socket.
+    """
+    p = rx(f, 1)
     if p == b"*":
-        n = int(rl(s))
-        out = []
-        for _ in range(n):
-            assert rx(s, 1) == b"$"
-            l = int(rl(s))
-            out.append(rx(s, l).decode())
-            rx(s, 2)
-        return out
+        return [read_bulk(f) for _ in range(int(rl(f)))]
     elif p == b"+":
-        return [rl(s).decode()]
+        return [rl(f).decode()]
     elif p == b"$":
-        n = int(rl(s))
-        d = rx(s, n)
-        rx(s, 2)
-        return [d.decode()]
+        return [read_payload(f)]
     elif p == b":":
-        return [rl(s).decode()]
+        return [rl(f).decode()]
     else:
         raise RuntimeError(f"repl unexpected: {p}")
 
 
+def _sock(port, timeout=2):
+    """Connect to 127.0.0.1:``port`` with Nagle disabled for small frames."""
+    s = socket.create_connection(("127.0.0.1", port), timeout=timeout)
+    s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return s
+
+
+def _wait_ready(port, secs=3.0):
+    """Retry connecting, backing off from 1 ms, until the server listens."""
+    deadline = time.monotonic() + secs
+    delay = 0.001
+    while True:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.05):
+                return
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+        time.sleep(delay)
+        delay = min(delay * 2, 0.05)
+
+
 def main() -> int:
     p = subprocess.Popen([str(ROOT / "peadb-server"), "--port", "6514", "--bind", "127.0.0.1", "--loglevel", "error"])
     try:
-        time.sleep(0.25)
-        with socket.create_connection(("127.0.0.1", 6514), timeout=2) as c, socket.create_connection(("127.0.0.1", 6514), timeout=2) as r:
-            assert cmd(c, "FLUSHALL") == "OK"
+        _wait_ready(6514)
+        with _sock(6514) as c, _sock(6514) as r:
+            cf = c.makefile("rb", buffering=READ_BUFFER)
+            rf = r.makefile("rb", buffering=READ_BUFFER)
+            assert cmd(c, cf, "FLUSHALL") == "OK"
             r.sendall(b"SYNC\r\n")
-            assert rx(r, 1) == b"$"
-            assert rl(r) == b"0"
+            assert rx(rf, 1) == b"$"
+            assert rl(rf) == b"0"
 
-            assert cmd(c, "EVAL", "redis.call('hmget', KEYS[1], 1, 2, 3)", "1", "key") is None
+            assert cmd(c, cf, "EVAL", "redis.call('hmget', KEYS[1], 1, 2, 3)", "1", "key") is None
             print("hmget done")
-            assert cmd(c, "EVAL", "redis.call('incrbyfloat', KEYS[1], 1)", "1", "key") is None
+            assert cmd(c, cf, "EVAL", "redis.call('incrbyfloat', KEYS[1], 1)", "1", "key") is None
             print("incrbyfloat done")
-            assert cmd(c, "EVAL", "redis.call('set', KEYS[1], '1', 'KEEPTTL')", "1", "key") is None
+            assert cmd(c, cf, "EVAL", "redis.call('set', KEYS[1], '1', 'KEEPTTL')", "1", "key") is None
             print("set done")
 
             # Read replication events
@@ -167,7 +199,7 @@ def main() -> int:
             events = []
             for i in range(5):
                 try:
-                    ev = repl_cmd(r)
+                    ev = repl_cmd(rf)
                     events.append(ev)
                     print(f"  repl event {i}: {ev}")
                 except Exception as e:
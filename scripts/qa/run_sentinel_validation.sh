@@ -115,6 +115,17 @@ cli() {
   redis-cli -h 127.0.0.1 -p "$port" "$@" 2>/dev/null
 }
 
+# Poll (up to ~5s) until `cli <port> <cmd...>` prints <want>, rather than
+# sleeping a fixed amount and hoping the server has caught up.
+wait_for() {
+  local port="$1" want="$2"; shift 2
+  for _ in $(seq 1 250); do
+    [[ "$(cli "$port" "$@")" == "$want" ]] && return 0
+    sleep 0.02
+  done
+  return 1
+}
+
 if [[ "$PEADB_BIN" != /* ]]; then
   PEADB_BIN="$ROOT_DIR/$PEADB_BIN"
 fi
@@ -135,12 +146,12 @@ command -v redis-cli >/dev/null 2>&1 || fail "redis-cli not found"
 echo "=== Starting primary on port $PRIMARY_PORT ==="
 "$PEADB_BIN" --port "$PRIMARY_PORT" --bind 127.0.0.1 --loglevel error &
 PRIMARY_PID=$!
-sleep 1
 
 echo "=== Starting replica on port $REPLICA_PORT ==="
 "$PEADB_BIN" --port "$REPLICA_PORT" --bind 127.0.0.1 --loglevel error &
 REPLICA_PID=$!
-sleep 1
+wait_for "$PRIMARY_PORT" PONG PING || fail "primary did not start"
+wait_for "$REPLICA_PORT" PONG PING || fail "replica did not start"
 
 echo "=== Configuring replica ==="
 cli "$REPLICA_PORT" REPLICAOF 127.0.0.1 "$PRIMARY_PORT" | grep -qi ok || fail "REPLICAOF failed"
@@ -151,7 +162,8 @@ cli "$PRIMARY_PORT" SET sentinel:key2 "world" | grep -qi ok || fail "SET key2 fa
 cli "$PRIMARY_PORT" LPUSH sentinel:list a b c >/dev/null || fail "LPUSH failed"
 
 echo "=== Waiting for replication sync ==="
-sleep 2
+# The list is written last, so once it has arrived the keys before it have too.
+wait_for "$REPLICA_PORT" 3 LLEN sentinel:list || fail "replica did not sync"
 
 echo "=== Verifying data on replica ==="
 V=$(cli "$REPLICA_PORT" GET sentinel:key1)
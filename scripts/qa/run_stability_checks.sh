@@ -117,7 +117,11 @@ ASAN_OPTIONS=detect_leaks=1:halt_on_error=1 \
   "$ROOT_DIR/build-asan/peadb-server" --port "$PORT" --bind 127.0.0.1 --loglevel error >/tmp/peadb-asan.log 2>&1 &
 SERVER_PID=$!
 trap 'kill ${SERVER_PID:-0} >/dev/null 2>&1 || true; wait ${SERVER_PID:-0} 2>/dev/null || true' EXIT
-sleep 1
+# Connect-retry rather than a fixed sleep; the ASAN build starts slower.
+for _ in $(seq 1 500); do
+  (exec 3<>"/dev/tcp/127.0.0.1/$PORT") 2>/dev/null && break
+  sleep 0.02
+done
 
 echo "=== Running stress loop for ${SECONDS_TO_RUN}s ==="
 end=$(( $(date +%s) + SECONDS_TO_RUN ))
@@ -10,20 +10,30 @@ Purpose
 What it does
     1. Starts a temporary ``redis-server`` in a fresh temp directory (on a
        configurable port, default 6512) with persistence disabled (save "").
+       The configuration is passed as command-line flags; no config file is
+       written.
     2. Connects to both the running PeaDB instance (--peadb-port) and the
        temporary Redis instance.
-    3. Iterates the PeaDB keyspace using SCAN (COUNT 1000).
-    4. For each key, reads its TYPE and value from PeaDB and replays the
-       equivalent write command to Redis.  Supported types:
-         - string (GET -> SET)
-         - hash   (HGETALL -> HSET)
-         - list   (LRANGE 0 -1 -> RPUSH)
-         - set    (SMEMBERS -> SADD)
-         - zset   (ZRANGE 0 -1 WITHSCORES -> ZADD)
-         - stream (XRANGE - + -> XADD)
-    5. Preserves per-key TTLs: reads PTTL from PeaDB and applies PEXPIRE
-       on the Redis side when the TTL is positive.
-    6. Calls SAVE on the temporary Redis to flush data to ``dump.rdb``.
+    3. Iterates the PeaDB keyspace using SCAN (COUNT --scan-count, default
+       5000), in batches of 256 keys.
+    4. For each batch, pipelines DUMP + PTTL for every key, then pipelines
+       ``RESTORE key ttl payload REPLACE`` to Redis, so the value moves as
+       its native serialisation in one round trip per step, not per key.
+       Per-key TTLs are carried by the RESTORE ttl argument.
+    5. Keys that cannot travel that way (DUMP returned nil, e.g. streams,
+       or Redis rejected the payload, e.g. an older RDB version) are
+       replayed type by type instead: pipelined TYPE + PTTL, then the
+       per-type copy, then PEXPIRE for positive TTLs.  Collections are
+       copied a page at a time (1000 elements) so memory stays bounded
+       regardless of key size.  Supported types:
+         - string (GET -> SET, pipelined across the batch)
+         - hash   (HSCAN -> HSET per page)
+         - list   (LRANGE windows -> RPUSH per window)
+         - set    (SSCAN -> SADD per page)
+         - zset   (ZSCAN -> ZADD per page)
+         - stream (XRANGE - + -> XADD; PeaDB's XRANGE has no COUNT)
+    6. Calls BGSAVE on the temporary Redis and polls INFO persistence until
+       the background save has finished writing ``dump.rdb``.
     7. Copies the resulting ``dump.rdb`` to the ``--out`` path.
     8. Terminates and cleans up the temporary Redis server.
 
@@ -36,6 +46,7 @@ How to run
     Optional flags:
         --peadb-host HOST     PeaDB host (default: 127.0.0.1)
         --target-port PORT    Port for the temporary Redis (default: 6512)
+        --scan-count N        Keys per SCAN call (default: 5000)
 
 Configuration (env vars)
     REDIS_SERVER    Path to the ``redis-server`` binary if it is not in PATH.
@@ -45,6 +56,8 @@ Prerequisites
     - ``redis-server`` installed and either in PATH or pointed to by
       REDIS_SERVER.
     - A running PeaDB instance on the specified host/port.
+    - Optional: the ``hiredis`` package; when importable it parses the
+      replies and encodes commands, otherwise pure-Python code is used.
 
 Interpreting the output
     On success:
@@ -62,12 +75,14 @@ Exit codes
 Limitations
     - Keys of unsupported types (e.g. module-specific types) are silently
       skipped.
-    - Large datasets may take significant time due to per-key round trips.
+    - DUMP payloads and streams are read in full, so a very large key of
+      those kinds is held in memory at once.
     - PTTL precision may drift slightly between read and apply.
 """
 from __future__ import annotations
 
 import argparse
+import functools
 import pathlib
 import shutil
 import socket
@@ -76,9 +91,19 @@ import tempfile
 import time
 import os
 
+try:
+    import hiredis
+except ImportError:  # optional; dec() below is the pure-Python fallback
+    hiredis = None
+
 ROOT = pathlib.Path(__file__).resolve().parents[2]
+BATCH_SIZE = 256
+PAGE_SIZE = 1000
+# Default keys per SCAN call (--scan-count).
+KEY_SCAN_COUNT = 5000
 
 
+@functools.lru_cache(maxsize=None)
 def resolve_redis_server() -> str:
     env = os.environ.get("REDIS_SERVER")
     if env:
@@ -92,95 +117,391 @@ def resolve_redis_server() -> str:
     raise RuntimeError("redis-server not found (set REDIS_SERVER or install redis-server)")
 
 
-def _arg_to_bytes(a: str | bytes | int) -> bytes:
-    if isinstance(a, bytes):
-        return a
-    return str(a).encode("utf-8", errors="surrogatepass")
-
-
-def _to_text(v: str | bytes) -> str:
-    if isinstance(v, bytes):
-        return v.decode("utf-8", errors="replace")
-    return v
+# Pre-rendered RESP headers for the lengths that cover nearly every frame.
+_PREFIX_LUT_SIZE = 4096
+_STAR = [b"*%d\r\n" % i for i in range(_PREFIX_LUT_SIZE)]
+_DOL = [b"$%d\r\n" % i for i in range(_PREFIX_LUT_SIZE)]
+_PAGE = b"%d" % PAGE_SIZE
+
+
+def enc_bytes(args) -> bytes:
+    """Encode a command whose arguments are all ``bytes`` already.
+
+    Keys and values read from PeaDB come back as ``bytes`` and are passed
+    through untouched, so binary keys survive and nothing is re-encoded.
+    """
+    n = len(args)
+    parts = [_STAR[n] if n < _PREFIX_LUT_SIZE else b"*%d\r\n" % n]
+    for b in args:
+        n = len(b)
+        parts.append(_DOL[n] if n < _PREFIX_LUT_SIZE else b"$%d\r\n" % n)
+        parts.append(b)
+        parts.append(b"\r\n")
+    return b"".join(parts)
+
+
+# hiredis (2.1+) encodes commands in C; enc_bytes() is the pure-Python fallback.
+if hiredis is not None and hasattr(hiredis, "pack_command"):
+    pack = hiredis.pack_command
+else:
+    pack = enc_bytes
+
+
+READ_SIZE = 1 << 16
+COMPACT_AT = 1 << 20
+SOCK_BUF = 1 << 20
+# Most buffers one sendmsg call accepts (Linux UIO_MAXIOV).
+IOV_MAX = 1024
+# Pipeline bounds: flush and drain replies after this many queued
+# commands or bytes, whichever comes first.
+PIPELINE_CMDS = 256
+PIPELINE_BYTES = 1 << 16
+
+
+class RespReader:
+    """Buffered reply reader: one ``recv`` refills many lines and bulks."""
+
+    __slots__ = ("sock", "buf", "pos", "parser")
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.buf = bytearray()
+        self.pos = 0
+        # hiredis.Reader hands errors to replyError; keep dec()'s tuple shape.
+        self.parser = hiredis.Reader(replyError=lambda m: ("ERR", m)) if hiredis else None
+
+    def _fill(self) -> None:
+        if self.pos == len(self.buf):
+            del self.buf[:]
+            self.pos = 0
+        elif self.pos > COMPACT_AT:
+            del self.buf[:self.pos]
+            self.pos = 0
+        c = self.sock.recv(READ_SIZE)
+        if not c:
+            raise RuntimeError("connection closed")
+        self.buf += c
+
+    def read_line(self) -> bytes:
+        while True:
+            idx = self.buf.find(b"\r\n", self.pos)
+            if idx >= 0:
+                break
+            self._fill()
+        line = self._take(self.pos, idx)
+        self.pos = idx + 2
+        return line
+
+    def read_exact(self, n: int) -> bytes:
+        while len(self.buf) - self.pos < n:
+            self._fill()
+        b = self._take(self.pos, self.pos + n)
+        self.pos += n
+        return b
 
+    def read_bulk(self, n: int) -> bytes:
+        """Read an ``n``-byte bulk body and drop its trailing CRLF."""
+        while len(self.buf) - self.pos < n + 2:
+            self._fill()
+        b = self._take(self.pos, self.pos + n)
+        self.pos += n + 2
+        return b
 
-def enc(args: list[str | bytes | int]) -> bytes:
-    out = [f"*{len(args)}\r\n".encode()]
-    for a in args:
-        b = _arg_to_bytes(a)
-        out.append(f"${len(b)}\r\n".encode())
-        out.append(b + b"\r\n")
-    return b"".join(out)
+    def _take(self, start: int, end: int) -> bytes:
+        # One copy straight out of the buffer; slicing the bytearray first
+        # would copy twice.  The view is released so the buffer can grow.
+        with memoryview(self.buf) as mv:
+            return mv[start:end].tobytes()
 
 
-def rx(sock: socket.socket, n: int) -> bytes:
-    b = bytearray()
-    while len(b) < n:
-        c = sock.recv(n - len(b))
+def dec(r: RespReader):
+    """Decode one reply without recursing: open arrays live on ``stack``."""
+    stack = []  # [items, remaining] per array still being filled
+    while True:
+        line = r.read_line()
+        p = line[:1]
+        if p == b"$":
+            n = int(line[1:])
+            v = None if n == -1 else r.read_bulk(n)
+        elif p == b"*":
+            n = int(line[1:])
+            if n > 0:
+                stack.append([[], n])
+                continue
+            v = None if n == -1 else []
+        elif p == b":":
+            v = int(line[1:])
+        elif p == b"+":
+            v = line[1:]
+        elif p == b"-":
+            v = ("ERR", line[1:].decode())
+        else:
+            raise RuntimeError(f"unsupported prefix {p!r}")
+        while stack:
+            top = stack[-1]
+            top[0].append(v)
+            top[1] -= 1
+            if top[1]:
+                break
+            v = stack.pop()[0]
+        else:
+            return v
+
+
+def read_reply(conn: RespReader):
+    """Read one reply, through hiredis when it is installed."""
+    parser = conn.parser
+    if parser is None:
+        return dec(conn)
+    while True:
+        reply = parser.gets()
+        if reply is not False:
+            return reply
+        c = conn.sock.recv(READ_SIZE)
         if not c:
             raise RuntimeError("connection closed")
-        b.extend(c)
-    return bytes(b)
+        parser.feed(c)
+
+
+def cmd(conn: RespReader, *args: bytes):
+    conn.sock.sendall(pack(args))
+    return read_reply(conn)
+
+
+def send_parts(sock: socket.socket, parts: list) -> None:
+    """Write ``parts`` in order without joining them into one buffer.
+
+    Uses scatter-gather ``sendmsg`` (at most IOV_MAX buffers per call) and
+    resumes after short writes; falls back to one ``sendall`` where the
+    platform has no ``sendmsg``.
+    """
+    if not hasattr(sock, "sendmsg"):
+        sock.sendall(b"".join(parts))
+        return
+    i, n = 0, len(parts)
+    while i < n:
+        batch = parts[i:i + IOV_MAX]
+        sent = sock.sendmsg(batch)
+        for buf in batch:
+            size = len(buf)
+            if sent < size:
+                parts[i] = memoryview(buf)[sent:]
+                break
+            sent -= size
+            i += 1
+
+
+class Pipeline:
+    """Bounded pipeline: at most ``max_cmds`` commands / ``max_bytes`` in flight.
+
+    ``add`` queues an encoded command and, once either bound is reached,
+    writes the queue and reads back its replies before accepting more, so a
+    large batch never piles up unread in the kernel buffers. ``drain``
+    flushes the remainder and returns every reply in order.
+    """
+
+    def __init__(self, conn: RespReader, max_cmds: int = PIPELINE_CMDS, max_bytes: int = PIPELINE_BYTES):
+        self.conn = conn
+        self.max_cmds = max_cmds
+        self.max_bytes = max_bytes
+        self.outbuf: list[bytes] = []
+        self.outbytes = 0
+        self.replies: list = []
+
+    def add(self, *args) -> None:
+        data = pack(args)
+        self.outbuf.append(data)
+        self.outbytes += len(data)
+        if len(self.outbuf) >= self.max_cmds or self.outbytes >= self.max_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        pending = len(self.outbuf)
+        if not pending:
+            return
+        send_parts(self.conn.sock, self.outbuf)
+        self.outbuf = []
+        self.outbytes = 0
+        self.replies += [read_reply(self.conn) for _ in range(pending)]
 
+    def drain(self) -> list:
+        self.flush()
+        replies, self.replies = self.replies, []
+        return replies
 
-def rl(sock: socket.socket) -> bytes:
-    b = bytearray()
-    while True:
-        b.extend(rx(sock, 1))
-        if len(b) >= 2 and b[-2:] == b"\r\n":
-            return bytes(b[:-2])
-
-
-def dec(sock: socket.socket):
-    p = rx(sock, 1)
-    if p == b"+":
-        return rl(sock).decode()
-    if p == b"-":
-        return ("ERR", rl(sock).decode())
-    if p == b":":
-        return int(rl(sock).decode())
-    if p == b"$":
-        n = int(rl(sock).decode())
-        if n == -1:
-            return None
-        b = rx(sock, n)
-        rx(sock, 2)
-        return b
-    if p == b"*":
-        n = int(rl(sock).decode())
-        if n == -1:
-            return None
-        return [dec(sock) for _ in range(n)]
-    raise RuntimeError(f"unsupported prefix {p!r}")
+
+def pipeline(conn: RespReader, cmds: list[tuple]) -> list:
+    """Send ``cmds`` through a bounded Pipeline and return their replies in order."""
+    p = Pipeline(conn)
+    for c in cmds:
+        p.add(*c)
+    return p.drain()
 
 
-def cmd(sock: socket.socket, *args: str | bytes | int):
-    sock.sendall(enc(list(args)))
-    return dec(sock)
+def connect(host: str, port: int, timeout: float) -> socket.socket:
+    sock = socket.create_connection((host, port), timeout=timeout)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    # Room for a whole pipelined page in flight in either direction.
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCK_BUF)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCK_BUF)
+    return sock
 
 
-def iter_keys(sock: socket.socket):
-    cursor = "0"
+def iter_keys(conn: RespReader, count: int = KEY_SCAN_COUNT):
+    cursor = b"0"
     while True:
-        resp = cmd(sock, "SCAN", cursor, "COUNT", 1000)
+        resp = cmd(conn, b"SCAN", cursor, b"COUNT", b"%d" % count)
         if not isinstance(resp, list) or len(resp) != 2:
             return
-        cursor = _to_text(resp[0])
+        cursor = resp[0]
         keys = resp[1] or []
         for key in keys:
             yield key
-        if cursor == "0":
+        if cursor == b"0":
+            break
+
+
+def batched(it, n: int):
+    batch = []
+    for x in it:
+        batch.append(x)
+        if len(batch) == n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def scan_pages(conn: RespReader, command: bytes, k: bytes):
+    """Yield the non-empty element pages of an HSCAN/SSCAN/ZSCAN walk."""
+    cursor = b"0"
+    while True:
+        resp = cmd(conn, command, k, cursor, b"COUNT", _PAGE)
+        if not isinstance(resp, list) or len(resp) != 2:
+            return
+        cursor = resp[0]
+        if resp[1]:
+            yield resp[1]
+        if cursor == b"0":
             break
 
 
+def copy_hash(src: RespReader, dst: RespReader, k: bytes) -> None:
+    for fv in scan_pages(src, b"HSCAN", k):
+        cmd(dst, b"HSET", k, *fv)
+
+
+def copy_set(src: RespReader, dst: RespReader, k: bytes) -> None:
+    for members in scan_pages(src, b"SSCAN", k):
+        cmd(dst, b"SADD", k, *members)
+
+
+def copy_zset(src: RespReader, dst: RespReader, k: bytes) -> None:
+    for ms in scan_pages(src, b"ZSCAN", k):
+        # ZSCAN returns [member, score, ...]; ZADD expects [score, member, ...]
+        zadd_args = []
+        for i in range(0, len(ms), 2):
+            zadd_args.append(ms[i + 1])  # score
+            zadd_args.append(ms[i])      # member
+        cmd(dst, b"ZADD", k, *zadd_args)
+
+
+def copy_list(src: RespReader, dst: RespReader, k: bytes) -> None:
+    start = 0
+    while True:
+        vals = cmd(src, b"LRANGE", k, b"%d" % start, b"%d" % (start + PAGE_SIZE - 1))
+        if not isinstance(vals, list) or not vals:
+            return
+        cmd(dst, b"RPUSH", k, *vals)
+        if len(vals) < PAGE_SIZE:
+            return
+        start += PAGE_SIZE
+
+
+def copy_stream(src: RespReader, dst: RespReader, k: bytes) -> None:
+    entries = cmd(src, b"XRANGE", k, b"-", b"+") or []
+    pipeline(dst, [(b"XADD", k, e[0], *(e[1] if len(e) > 1 else [])) for e in entries])
+
+
+# Per-key copiers keyed by the raw TYPE reply; strings are batched separately
+# in replay_batch and unknown types are skipped.
+HANDLERS = {
+    b"hash": copy_hash,
+    b"list": copy_list,
+    b"set": copy_set,
+    b"zset": copy_zset,
+    b"stream": copy_stream,
+}
+
+
+def restore_batch(src: RespReader, dst: RespReader, keys: list[bytes]) -> list[bytes]:
+    """Move ``keys`` with DUMP/RESTORE; return the keys that need a replay."""
+    meta = pipeline(src, [c for k in keys for c in ((b"DUMP", k), (b"PTTL", k))])
+    moved = []
+    fallback = []
+    for k, payload, pttl in zip(keys, meta[0::2], meta[1::2]):
+        if not isinstance(payload, bytes):
+            fallback.append(k)
+            continue
+        ttl = pttl if isinstance(pttl, int) and pttl > 0 else 0
+        moved.append((k, (b"RESTORE", k, b"%d" % ttl, payload, b"REPLACE")))
+    replies = pipeline(dst, [c for _, c in moved])
+    fallback.extend(k for (k, _), r in zip(moved, replies) if isinstance(r, tuple))
+    return fallback
+
+
+def replay_batch(src: RespReader, dst: RespReader, keys: list[bytes]) -> None:
+    """Rebuild ``keys`` on ``dst`` from type-specific reads on ``src``."""
+    meta = pipeline(src, [c for k in keys for c in ((b"TYPE", k), (b"PTTL", k))])
+    types = meta[0::2]
+    pttls = meta[1::2]
+
+    strings = [k for k, t in zip(keys, types) if t == b"string"]
+    values = pipeline(src, [(b"GET", k) for k in strings])
+    pipeline(dst, [(b"SET", k, v if v is not None else b"") for k, v in zip(strings, values)])
+
+    for k, t in zip(keys, types):
+        h = HANDLERS.get(t)
+        if h is not None:
+            h(src, dst, k)
+
+    pipeline(dst, [(b"PEXPIRE", k, b"%d" % pttl) for k, pttl in zip(keys, pttls) if isinstance(pttl, int) and pttl > 0])
+
+
+def bgsave(conn: RespReader, timeout: float = 60.0) -> None:
+    """Run BGSAVE and block until the forked save has finished.
+
+    LASTSAVE only has one-second resolution, so completion is read from
+    ``rdb_bgsave_in_progress`` in INFO persistence instead.
+    """
+    r = cmd(conn, b"BGSAVE")
+    if isinstance(r, tuple):
+        raise RuntimeError(f"BGSAVE failed: {r[1]}")
+    end = time.time() + timeout
+    while time.time() < end:
+        info = cmd(conn, b"INFO", b"persistence")
+        if b"rdb_bgsave_in_progress:0" in info:
+            if b"rdb_last_bgsave_status:ok" not in info:
+                raise RuntimeError("BGSAVE reported an error")
+            return
+        time.sleep(0.05)
+    raise RuntimeError("BGSAVE did not finish")
+
+
 def wait_ready(port: int) -> None:
+    """Poll with PING until +PONG (not -LOADING), backing off 1 ms to 50 ms."""
     end = time.time() + 5
+    delay = 0.001
     while time.time() < end:
         try:
-            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
-                return
+            with connect("127.0.0.1", port, 0.2) as sock:
+                sock.sendall(b"*1\r\n$4\r\nPING\r\n")
+                if sock.recv(32).startswith(b"+PONG"):
+                    return
         except OSError:
-            time.sleep(0.05)
+            pass
+        time.sleep(delay)
+        delay = min(delay * 1.5, 0.05)
     raise RuntimeError("redis target not ready")
 
 
@@ -190,7 +511,10 @@ def main() -> int:
     ap.add_argument("--peadb-host", default="127.0.0.1")
     ap.add_argument("--out", required=True)
     ap.add_argument("--target-port", type=int, default=6512)
+    ap.add_argument("--scan-count", type=int, default=KEY_SCAN_COUNT)
     args = ap.parse_args()
+    if args.scan_count < 1:
+        ap.error("--scan-count must be at least 1")
 
     out_path = pathlib.Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
@@ -199,66 +523,30 @@ def main() -> int:
 
     with tempfile.TemporaryDirectory(prefix="peadb-rdb-export-") as td:
         tdp = pathlib.Path(td)
-        conf = tdp / "redis.conf"
-        conf.write_text(
-            "\n".join(
-                [
-                    "bind 127.0.0.1",
-                    f"port {args.target_port}",
-                    f"dir {tdp}",
-                    "dbfilename dump.rdb",
-                    "appendonly no",
-                    'save ""',
-                    "daemonize no",
-                ]
-            )
-            + "\n",
-            encoding="utf-8",
+        proc = subprocess.Popen(
+            [
+                redis_server,
+                "--bind", "127.0.0.1",
+                "--port", str(args.target_port),
+                "--dir", str(tdp),
+                "--dbfilename", "dump.rdb",
+                "--appendonly", "no",
+                "--save", "",
+                "--daemonize", "no",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
         )
-        proc = subprocess.Popen([redis_server, str(conf)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         try:
             wait_ready(args.target_port)
-            with socket.create_connection((args.peadb_host, args.peadb_port), timeout=3) as src, socket.create_connection(("127.0.0.1", args.target_port), timeout=3) as dst:
-                for k in iter_keys(src):
-                    t = cmd(src, "TYPE", k)
-                    if isinstance(t, bytes):
-                        t = _to_text(t)
-                    if t == "string":
-                        v = cmd(src, "GET", k)
-                        cmd(dst, "SET", k, v if v is not None else "")
-                    elif t == "hash":
-                        fv = cmd(src, "HGETALL", k) or []
-                        if fv:
-                            cmd(dst, "HSET", k, *fv)
-                    elif t == "list":
-                        vals = cmd(src, "LRANGE", k, "0", "-1") or []
-                        if vals:
-                            cmd(dst, "RPUSH", k, *vals)
-                    elif t == "set":
-                        vals = cmd(src, "SMEMBERS", k) or []
-                        if vals:
-                            cmd(dst, "SADD", k, *vals)
-                    elif t == "zset":
-                        vals = cmd(src, "ZRANGE", k, "0", "-1", "WITHSCORES") or []
-                        if vals:
-                            # ZRANGE returns [member, score, ...]; ZADD expects [score, member, ...]
-                            zadd_args = []
-                            for i in range(0, len(vals), 2):
-                                zadd_args.append(vals[i + 1])  # score
-                                zadd_args.append(vals[i])      # member
-                            cmd(dst, "ZADD", k, *zadd_args)
-                    elif t == "stream":
-                        entries = cmd(src, "XRANGE", k, "-", "+") or []
-                        for e in entries:
-                            sid = e[0]
-                            fields = e[1] if len(e) > 1 else []
-                            cmd(dst, "XADD", k, sid, *fields)
-
-                    pttl = cmd(src, "PTTL", k)
-                    if isinstance(pttl, int) and pttl > 0:
-                        cmd(dst, "PEXPIRE", k, pttl)
-
-                cmd(dst, "SAVE")
+            with connect(args.peadb_host, args.peadb_port, 3) as src_sock, connect("127.0.0.1", args.target_port, 3) as dst_sock:
+                src, dst = RespReader(src_sock), RespReader(dst_sock)
+                for keys in batched(iter_keys(src, args.scan_count), BATCH_SIZE):
+                    fallback = restore_batch(src, dst, keys)
+                    if fallback:
+                        replay_batch(src, dst, fallback)
+
+                bgsave(dst)
             shutil.copy2(tdp / "dump.rdb", out_path)
         finally:
             proc.terminate()
@@ -9,19 +9,37 @@ Purpose
 
 What it does
     1. Connects to the source and target servers via raw TCP sockets (no
-       external dependencies).
+       external dependencies): one SCAN connection, plus one source and
+       one target connection per worker (--workers, default 8).
     2. Optionally flushes the target (--flush-target).
-    3. Iterates the source keyspace using SCAN (COUNT 1000).
-    4. For each key, reads its TYPE and value from the source and replays
-       the equivalent write command to the target.  Supported types:
+    3. Iterates the source keyspace using SCAN (COUNT --scan-count,
+       default 5000).
+    4. For each SCAN page, pipelines TYPE + DUMP + PTTL for every key, then
+       ``RESTORE key ttl payload REPLACE`` to the target, so values move
+       in their native serialisation (TTL included) with no per-type work.
+    5. Keys that cannot travel that way (DUMP returned nil, or the target
+       rejected the payload, e.g. a different RDB version or encoding)
+       and every key under --compat-mode are replayed instead from the
+       TYPE and PTTL already fetched: the value reads, then the equivalent
+       write commands to the target.  Collections are read a slice at a time
+       (2000 elements per *SCAN call, 5000 per LRANGE window); each round
+       pipelines the next slice of every key that still has data, so a
+       page costs a few round trips rather than several per key.
+       Supported types:
          - string  (GET -> SET)
-         - hash    (HGETALL -> HSET)
-         - list    (LRANGE 0 -1 -> RPUSH)
-         - set     (SMEMBERS -> SADD)
-         - zset    (ZRANGE 0 -1 WITHSCORES -> ZADD)
+         - hash    (HSCAN -> HSET per slice)
+         - list    (LRANGE windows -> RPUSH per window)
+         - set     (SSCAN -> SADD per slice)
+         - zset    (ZSCAN -> ZADD per slice)
          - stream  (XRANGE - + -> XADD with original entry IDs)
-    5. Preserves per-key TTLs via PTTL + PEXPIRE when the source TTL is
-       positive.
+       Replayed keys keep positive TTLs via PEXPIRE, sent once the page's
+       writes are done.
+    6. With --follow, keeps running after the initial copy: it subscribes
+       to the source's db 0 keyspace events (``CONFIG SET
+       notify-keyspace-events KA`` + ``PSUBSCRIBE __keyspace@0__:*``)
+       before copying, then gathers the changed keys for 1 ms (or 1000
+       keys), DELs them on the target and re-copies them with the same
+       pipelined path.  Stop it with Ctrl-C.
 
 How to run
     From the repo root:
@@ -33,9 +51,15 @@ How to run
         --source-host HOST   Source host (default: 127.0.0.1)
         --target-host HOST   Target host (default: 127.0.0.1)
         --flush-target       Run FLUSHALL on target before syncing
+        --workers N          Parallel connection pairs (default: 8); each
+                             SCAN page is split round-robin across them
+        --scan-count N       Keys per SCAN call (default: 5000)
+        --compat-mode        Skip DUMP/RESTORE and replay every key by type
+        --follow             Keep applying source changes after the sync
 
 Prerequisites
-    - Python 3.9+ (stdlib only, no pip packages).
+    - Python 3.9+ (stdlib only; the ``hiredis`` package is used to parse
+      and encode commands when it is importable, but is not required).
     - Both source and target servers must be running and reachable.
 
 Interpreting the output
@@ -51,100 +75,491 @@ Exit codes
     Non-zero   Connection or protocol errors.
 
 Limitations
-    - This is a point-in-time snapshot, not a live continuous sync.
+    - Without --follow this is a point-in-time snapshot.  --follow needs
+      a source that emits keyspace notifications (Redis; PeaDB does not),
+      overwrites its notify-keyspace-events setting, and only follows
+      db 0.
     - Keys of unsupported types are silently skipped.
     - Does not preserve eviction policies, ACLs, module data, or Lua
       scripts.
-    - Large datasets are slow due to per-key round-trip overhead.
+    - Streams are read whole (XRANGE - +), so a very large stream is held
+      in memory at once.
     - PTTL precision may drift slightly between read and apply.
 """
 from __future__ import annotations
 
 import argparse
+import contextlib
+import selectors
 import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+try:
+    import hiredis
+except ImportError:  # optional; dec() below is the pure-Python fallback
+    hiredis = None
 
-def _arg_to_bytes(a: str | bytes | int) -> bytes:
-    if isinstance(a, bytes):
-        return a
-    return str(a).encode("utf-8", errors="surrogatepass")
 
-
-def _to_text(v: str | bytes) -> str:
-    if isinstance(v, bytes):
-        return v.decode("utf-8", errors="replace")
-    return v
+CRLF = b"\r\n"
+# Pre-rendered RESP headers for the lengths that cover nearly every frame.
+_PREFIX_LUT_SIZE = 4096
+_STAR = [b"*%d\r\n" % i for i in range(_PREFIX_LUT_SIZE)]
+_DOL = [b"$%d\r\n" % i for i in range(_PREFIX_LUT_SIZE)]
 
 
 def enc(args: list[str | bytes | int]) -> bytes:
-    out = [f"*{len(args)}\r\n".encode()]
+    n = len(args)
+    out = [_STAR[n] if n < _PREFIX_LUT_SIZE else b"*%d\r\n" % n]
     for a in args:
-        b = _arg_to_bytes(a)
-        out.append(f"${len(b)}\r\n".encode())
-        out.append(b + b"\r\n")
+        b = a if isinstance(a, bytes) else str(a).encode("utf-8", errors="surrogatepass")
+        n = len(b)
+        out += (_DOL[n] if n < _PREFIX_LUT_SIZE else b"$%d\r\n" % n, b, CRLF)
     return b"".join(out)
 
 
-def rx(sock: socket.socket, n: int) -> bytes:
-    b = bytearray()
-    while len(b) < n:
-        c = sock.recv(n - len(b))
+# hiredis (2.1+) encodes commands in C; enc() is the pure-Python fallback.
+if hiredis is not None and hasattr(hiredis, "pack_command"):
+    pack = hiredis.pack_command
+else:
+    def pack(args: tuple) -> bytes:
+        return enc(list(args))
+
+
+READ_SIZE = 1 << 16
+COMPACT_AT = 1 << 20
+SOCK_BUF = 1 << 20
+# Most buffers one sendmsg call accepts (Linux UIO_MAXIOV).
+IOV_MAX = 1024
+# Pipeline bounds: flush and drain replies after this many queued
+# commands or bytes, whichever comes first.
+PIPELINE_CMDS = 256
+PIPELINE_BYTES = 1 << 16
+# Default keys per SCAN call (--scan-count).
+KEY_SCAN_COUNT = 5000
+# Elements per HSCAN/SSCAN/ZSCAN call and per LRANGE window.
+SCAN_COUNT = 2000
+LIST_PAGE = 5000
+# --follow: keyspace-event channel prefix for db 0, and how long / how many
+# changed keys to collect before re-copying them in one pipelined batch.
+KEYSPACE_PREFIX = b"__keyspace@0__:"
+FOLLOW_FLUSH = 0.001
+FOLLOW_BATCH = 1000
+
+
+class RespReader:
+    """Buffered reply reader: one ``recv`` refills many lines and bulks."""
+
+    __slots__ = ("sock", "buf", "pos", "parser")
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.buf = bytearray()
+        self.pos = 0
+        # hiredis.Reader hands errors to replyError; keep dec()'s tuple shape.
+        self.parser = hiredis.Reader(replyError=lambda m: ("ERR", m)) if hiredis else None
+
+    def _fill(self) -> None:
+        if self.pos == len(self.buf):
+            del self.buf[:]
+            self.pos = 0
+        elif self.pos > COMPACT_AT:
+            del self.buf[:self.pos]
+            self.pos = 0
+        c = self.sock.recv(READ_SIZE)
         if not c:
             raise RuntimeError("connection closed")
-        b.extend(c)
-    return bytes(b)
+        self.buf += c
+
+    def read_line(self) -> bytes:
+        while True:
+            idx = self.buf.find(b"\r\n", self.pos)
+            if idx >= 0:
+                break
+            self._fill()
+        line = self._take(self.pos, idx)
+        self.pos = idx + 2
+        return line
+
+    def read_exact(self, n: int) -> bytes:
+        while len(self.buf) - self.pos < n:
+            self._fill()
+        b = self._take(self.pos, self.pos + n)
+        self.pos += n
+        return b
+
+    def read_bulk(self, n: int) -> bytes:
+        """Read an ``n``-byte bulk body and drop its trailing CRLF."""
+        while len(self.buf) - self.pos < n + 2:
+            self._fill()
+        b = self._take(self.pos, self.pos + n)
+        self.pos += n + 2
+        return b
 
+    def _take(self, start: int, end: int) -> bytes:
+        # One copy straight out of the buffer; slicing the bytearray first
+        # would copy twice.  The view is released so the buffer can grow.
+        with memoryview(self.buf) as mv:
+            return mv[start:end].tobytes()
 
-def rl(sock: socket.socket) -> bytes:
-    b = bytearray()
+
+def dec(r: RespReader):
+    """Decode one reply without recursing: open arrays live on ``stack``."""
+    stack = []  # [items, remaining] per array still being filled
     while True:
-        b.extend(rx(sock, 1))
-        if len(b) >= 2 and b[-2:] == b"\r\n":
-            return bytes(b[:-2])
-
-
-def dec(sock: socket.socket):
-    p = rx(sock, 1)
-    if p == b"+":
-        return rl(sock).decode()
-    if p == b"-":
-        return ("ERR", rl(sock).decode())
-    if p == b":":
-        return int(rl(sock).decode())
-    if p == b"$":
-        n = int(rl(sock).decode())
-        if n == -1:
-            return None
-        b = rx(sock, n)
-        rx(sock, 2)
-        return b
-    if p == b"*":
-        n = int(rl(sock).decode())
-        if n == -1:
-            return None
-        return [dec(sock) for _ in range(n)]
-    raise RuntimeError(f"unsupported prefix {p!r}")
+        line = r.read_line()
+        p = line[:1]
+        if p == b"$":
+            n = int(line[1:])
+            v = None if n == -1 else r.read_bulk(n)
+        elif p == b"*":
+            n = int(line[1:])
+            if n > 0:
+                stack.append([[], n])
+                continue
+            v = None if n == -1 else []
+        elif p == b":":
+            v = int(line[1:])
+        elif p == b"+":
+            v = line[1:]
+        elif p == b"-":
+            v = ("ERR", line[1:].decode())
+        else:
+            raise RuntimeError(f"unsupported prefix {p!r}")
+        while stack:
+            top = stack[-1]
+            top[0].append(v)
+            top[1] -= 1
+            if top[1]:
+                break
+            v = stack.pop()[0]
+        else:
+            return v
+
+
+def read_reply(conn: RespReader):
+    """Read one reply, through hiredis when it is installed."""
+    parser = conn.parser
+    if parser is None:
+        return dec(conn)
+    while True:
+        reply = parser.gets()
+        if reply is not False:
+            return reply
+        c = conn.sock.recv(READ_SIZE)
+        if not c:
+            raise RuntimeError("connection closed")
+        parser.feed(c)
+
+
+def cmd(conn: RespReader, *args: str | bytes | int):
+    conn.sock.sendall(pack(args))
+    return read_reply(conn)
+
+
+def send_parts(sock: socket.socket, parts: list) -> None:
+    """Write ``parts`` in order without joining them into one buffer.
+
+    Uses scatter-gather ``sendmsg`` (at most IOV_MAX buffers per call) and
+    resumes after short writes; falls back to one ``sendall`` where the
+    platform has no ``sendmsg``.
+    """
+    if not hasattr(sock, "sendmsg"):
+        sock.sendall(b"".join(parts))
+        return
+    i, n = 0, len(parts)
+    while i < n:
+        batch = parts[i:i + IOV_MAX]
+        sent = sock.sendmsg(batch)
+        for buf in batch:
+            size = len(buf)
+            if sent < size:
+                parts[i] = memoryview(buf)[sent:]
+                break
+            sent -= size
+            i += 1
+
+
+class Pipeline:
+    """Bounded pipeline: at most ``max_cmds`` commands / ``max_bytes`` in flight.
+
+    ``add`` queues an encoded command and, once either bound is reached,
+    writes the queue and reads back its replies before accepting more, so a
+    large batch never piles up unread in the kernel buffers. ``drain``
+    flushes the remainder and returns every reply in order.
+    """
+
+    def __init__(self, conn: RespReader, max_cmds: int = PIPELINE_CMDS, max_bytes: int = PIPELINE_BYTES):
+        self.conn = conn
+        self.max_cmds = max_cmds
+        self.max_bytes = max_bytes
+        self.outbuf: list[bytes] = []
+        self.outbytes = 0
+        self.replies: list = []
+
+    def add(self, *args) -> None:
+        data = pack(args)
+        self.outbuf.append(data)
+        self.outbytes += len(data)
+        if len(self.outbuf) >= self.max_cmds or self.outbytes >= self.max_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        pending = len(self.outbuf)
+        if not pending:
+            return
+        send_parts(self.conn.sock, self.outbuf)
+        self.outbuf = []
+        self.outbytes = 0
+        self.replies += [read_reply(self.conn) for _ in range(pending)]
+
+    def drain(self) -> list:
+        self.flush()
+        replies, self.replies = self.replies, []
+        return replies
+
+
+def pipeline(conn: RespReader, cmds: list[tuple]) -> list:
+    """Send ``cmds`` through a bounded Pipeline and return their replies in order."""
+    p = Pipeline(conn)
+    for c in cmds:
+        p.add(*c)
+    return p.drain()
 
 
-def cmd(sock: socket.socket, *args: str | bytes | int):
-    sock.sendall(enc(list(args)))
-    return dec(sock)
+def connect(host: str, port: int, timeout: float) -> socket.socket:
+    sock = socket.create_connection((host, port), timeout=timeout)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    # Room for a whole pipelined page in flight in either direction.
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCK_BUF)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCK_BUF)
+    return sock
 
 
-def iter_keys(sock: socket.socket):
-    cursor = "0"
+def iter_key_pages(conn: RespReader, count: int = KEY_SCAN_COUNT):
+    """Yield the non-empty key pages of a SCAN walk."""
+    cursor = b"0"
     while True:
-        resp = cmd(sock, "SCAN", cursor, "COUNT", 1000)
+        resp = cmd(conn, "SCAN", cursor, "COUNT", count)
         if not isinstance(resp, list) or len(resp) != 2:
             return
-        cursor = _to_text(resp[0])
-        keys = resp[1] or []
-        for key in keys:
-            yield key
-        if cursor == "0":
+        cursor = resp[0]
+        if resp[1]:
+            yield resp[1]
+        if cursor == b"0":
             break
 
 
+def _scan_elements(v) -> list:
+    # *SCAN replies are [cursor, elements].
+    return v[1] if isinstance(v, list) and len(v) == 2 and v[1] else []
+
+
+def _write_string(k: bytes, v) -> list[tuple]:
+    return [("SET", k, v if v is not None else "")]
+
+
+def _write_hash(k: bytes, v) -> list[tuple]:
+    fv = _scan_elements(v)
+    return [("HSET", k, *fv)] if fv else []
+
+
+def _write_set(k: bytes, v) -> list[tuple]:
+    members = _scan_elements(v)
+    return [("SADD", k, *members)] if members else []
+
+
+def _write_zset(k: bytes, v) -> list[tuple]:
+    ms = _scan_elements(v)
+    if not ms:
+        return []
+    # ZSCAN returns [member, score, ...]; ZADD expects [score, member, ...]
+    zadd_args = []
+    for i in range(0, len(ms), 2):
+        zadd_args.append(ms[i + 1])  # score
+        zadd_args.append(ms[i])      # member
+    return [("ZADD", k, *zadd_args)]
+
+
+def _write_list(k: bytes, v) -> list[tuple]:
+    return [("RPUSH", k, *v)] if isinstance(v, list) and v else []
+
+
+def _write_stream(k: bytes, v) -> list[tuple]:
+    if not isinstance(v, list):
+        return []
+    return [("XADD", k, e[0], *(e[1] if len(e) > 1 else [])) for e in v]
+
+
+def _next_scan(c: tuple, v) -> tuple | None:
+    if not isinstance(v, list) or len(v) != 2 or v[0] == b"0":
+        return None
+    return (c[0], c[1], v[0], *c[3:])
+
+
+def _next_window(c: tuple, v) -> tuple | None:
+    if not isinstance(v, list) or len(v) < LIST_PAGE:
+        return None
+    return ("LRANGE", c[1], c[2] + LIST_PAGE, c[3] + LIST_PAGE)
+
+
+def _no_next(c: tuple, v) -> None:
+    return None
+
+
+# Raw TYPE reply -> (first read, minus the key; writes for each reply; the
+# follow-up read or None).  Collections start a *SCAN or LRANGE window so no
+# key is read whole; unknown types are skipped.
+REPLAY = {
+    b"string": (("GET",), _write_string, _no_next),
+    b"hash": (("HSCAN", "0", "COUNT", SCAN_COUNT), _write_hash, _next_scan),
+    b"list": (("LRANGE", 0, LIST_PAGE - 1), _write_list, _next_window),
+    b"set": (("SSCAN", "0", "COUNT", SCAN_COUNT), _write_set, _next_scan),
+    b"zset": (("ZSCAN", "0", "COUNT", SCAN_COUNT), _write_zset, _next_scan),
+    b"stream": (("XRANGE", "-", "+"), _write_stream, _no_next),
+}
+
+
+def restore_page(dst: RespReader, rows: list[tuple]) -> list[tuple]:
+    """RESTORE each ``(key, type, payload, pttl)``; return what must replay.
+
+    ``RESTORE key ttl payload REPLACE`` for every payload goes out in one
+    write.  A key falls back, as ``(key, type, pttl)``, when DUMP returned
+    nil or the target rejected the payload (different RDB version or
+    encoding).
+    """
+    moved = []
+    fallback = []
+    for k, t, payload, pttl in rows:
+        if not isinstance(payload, bytes):
+            fallback.append((k, t, pttl))
+            continue
+        ttl = pttl if isinstance(pttl, int) and pttl > 0 else 0
+        moved.append(((k, t, pttl), ("RESTORE", k, ttl, payload, "REPLACE")))
+    replies = pipeline(dst, [c for _, c in moved])
+    fallback.extend(row for (row, _), r in zip(moved, replies) if isinstance(r, tuple))
+    return fallback
+
+
+def copy_page(src: RespReader, dst: RespReader, keys: list[bytes], compat: bool = False) -> None:
+    """Copy one SCAN page: DUMP/RESTORE first, typed replay for the rest.
+
+    TYPE, DUMP and PTTL for every key share one pipelined write, so the
+    fallback already knows each key's type and TTL and costs no extra
+    round trip; --compat-mode leaves DUMP out.
+    """
+    if compat:
+        meta = pipeline(src, [c for k in keys for c in (("TYPE", k), ("PTTL", k))])
+        rows = list(zip(keys, meta[0::2], meta[1::2]))
+    else:
+        meta = pipeline(src, [c for k in keys for c in (("TYPE", k), ("DUMP", k), ("PTTL", k))])
+        rows = restore_page(dst, list(zip(keys, meta[0::3], meta[1::3], meta[2::3])))
+    if rows:
+        replay_page(src, dst, rows)
+
+
+def replay_page(src: RespReader, dst: RespReader, rows: list[tuple]) -> None:
+    """Rebuild ``(key, type, pttl)`` rows with pipelined per-type reads and writes.
+
+    Each round pipelines the next read of every key that still has data,
+    and the matching writes to ``dst``; collections advance one
+    SCAN_COUNT / LIST_PAGE slice per round, so no key is ever read whole.
+    PEXPIRE for positive TTLs goes out once every key is complete.
+    """
+    reads = []
+    for k, t, _ in rows:
+        entry = REPLAY.get(t)
+        if entry is not None:
+            first, write, follow_up = entry
+            reads.append((k, write, follow_up, (first[0], k, *first[1:])))
+
+    while reads:
+        values = pipeline(src, [c for *_, c in reads])
+        writes = []
+        pending = []
+        for (k, write, follow_up, c), v in zip(reads, values):
+            writes.extend(write(k, v))
+            nc = follow_up(c, v)
+            if nc is not None:
+                pending.append((k, write, follow_up, nc))
+        pipeline(dst, writes)
+        reads = pending
+
+    pipeline(dst, [("PEXPIRE", k, pttl) for k, _, pttl in rows if isinstance(pttl, int) and pttl > 0])
+
+
+def copy_keyspace(src_addr: tuple[str, int], dst_addr: tuple[str, int], timeout: float, workers: int, flush_target: bool, compat: bool, scan_count: int) -> None:
+    """SCAN the source and copy each page across ``workers`` connection pairs.
+
+    Every worker owns one source and one target connection and runs
+    copy_page() on a round-robin share of the page; the page is joined
+    before the next SCAN call so only one page is in flight.
+    """
+    with contextlib.ExitStack() as stack, ThreadPoolExecutor(max_workers=workers) as pool:
+        def open_conn(addr: tuple[str, int]) -> RespReader:
+            return RespReader(stack.enter_context(connect(addr[0], addr[1], timeout)))
+
+        scan = open_conn(src_addr)
+        srcs = [open_conn(src_addr) for _ in range(workers)]
+        dsts = [open_conn(dst_addr) for _ in range(workers)]
+        if flush_target:
+            cmd(dsts[0], "FLUSHALL")
+
+        for keys in iter_key_pages(scan, scan_count):
+            shards = [keys[i::workers] for i in range(workers)]
+            list(pool.map(copy_page, srcs, dsts, shards, [compat] * workers))
+
+
+def subscribe_keyspace(sock: socket.socket) -> RespReader:
+    """Enable keyspace events on the source and PSUBSCRIBE to db 0's."""
+    sub = RespReader(sock)
+    r = cmd(sub, "CONFIG", "SET", "notify-keyspace-events", "KA")
+    if isinstance(r, tuple):
+        raise RuntimeError(f"source cannot emit keyspace events: {r[1]}")
+    cmd(sub, "PSUBSCRIBE", KEYSPACE_PREFIX + b"*")
+    return sub
+
+
+def has_buffered(conn: RespReader) -> bool:
+    if conn.parser is not None:
+        return conn.parser.has_data()
+    return conn.pos < len(conn.buf)
+
+
+def resync_keys(src: RespReader, dst: RespReader, keys: list[bytes], compat: bool) -> None:
+    """Make ``keys`` on ``dst`` match ``src`` again, deleting vanished ones."""
+    pipeline(dst, [("DEL", k) for k in keys])
+    copy_page(src, dst, keys, compat)
+
+
+def follow(sub: RespReader, src_addr: tuple[str, int], dst_addr: tuple[str, int], timeout: float, compat: bool) -> None:
+    """Apply source changes to the target until interrupted.
+
+    Keys named by keyspace events are collected for FOLLOW_FLUSH seconds
+    (or until FOLLOW_BATCH of them are pending) and then re-copied in one
+    pipelined batch.  The selector wakes on new events or on that timer.
+    """
+    with connect(src_addr[0], src_addr[1], timeout) as src_sock, connect(dst_addr[0], dst_addr[1], timeout) as dst_sock, selectors.DefaultSelector() as sel:
+        src, dst = RespReader(src_sock), RespReader(dst_sock)
+        sel.register(sub.sock, selectors.EVENT_READ)
+        dirty: dict[bytes, None] = {}
+        deadline = 0.0
+        while True:
+            if dirty and (len(dirty) >= FOLLOW_BATCH or time.monotonic() >= deadline):
+                resync_keys(src, dst, list(dirty), compat)
+                dirty.clear()
+            if not has_buffered(sub):
+                wait = max(0.0, deadline - time.monotonic()) if dirty else None
+                if not sel.select(wait):
+                    continue
+            msg = read_reply(sub)
+            # ["pmessage", pattern, "__keyspace@0__:<key>", event]
+            if isinstance(msg, list) and len(msg) == 4 and msg[2].startswith(KEYSPACE_PREFIX):
+                if not dirty:
+                    deadline = time.monotonic() + FOLLOW_FLUSH
+                dirty[msg[2][len(KEYSPACE_PREFIX):]] = None
+
+
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--source-host", default="127.0.0.1")
@@ -152,52 +567,33 @@ def main() -> int:
     ap.add_argument("--target-host", default="127.0.0.1")
     ap.add_argument("--target-port", type=int, required=True)
     ap.add_argument("--flush-target", action="store_true")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--scan-count", type=int, default=KEY_SCAN_COUNT)
+    ap.add_argument("--compat-mode", action="store_true", help="skip DUMP/RESTORE and replay every key by type")
+    ap.add_argument("--follow", action="store_true", help="after the initial sync, keep applying source changes")
     args = ap.parse_args()
-
-    with socket.create_connection((args.source_host, args.source_port), timeout=5) as src, socket.create_connection((args.target_host, args.target_port), timeout=5) as dst:
-        if args.flush_target:
-            cmd(dst, "FLUSHALL")
-
-        for k in iter_keys(src):
-            t = cmd(src, "TYPE", k)
-            if isinstance(t, bytes):
-                t = _to_text(t)
-            if t == "string":
-                v = cmd(src, "GET", k)
-                cmd(dst, "SET", k, v if v is not None else "")
-            elif t == "hash":
-                fv = cmd(src, "HGETALL", k) or []
-                if fv:
-                    cmd(dst, "HSET", k, *fv)
-            elif t == "list":
-                vals = cmd(src, "LRANGE", k, "0", "-1") or []
-                if vals:
-                    cmd(dst, "RPUSH", k, *vals)
-            elif t == "set":
-                vals = cmd(src, "SMEMBERS", k) or []
-                if vals:
-                    cmd(dst, "SADD", k, *vals)
-            elif t == "zset":
-                vals = cmd(src, "ZRANGE", k, "0", "-1", "WITHSCORES") or []
-                if vals:
-                    # ZRANGE returns [member, score, ...]; ZADD expects [score, member, ...]
-                    zadd_args = []
-                    for i in range(0, len(vals), 2):
-                        zadd_args.append(vals[i + 1])  # score
-                        zadd_args.append(vals[i])      # member
-                    cmd(dst, "ZADD", k, *zadd_args)
-            elif t == "stream":
-                entries = cmd(src, "XRANGE", k, "-", "+") or []
-                for e in entries:
-                    sid = e[0]
-                    fields = e[1] if len(e) > 1 else []
-                    cmd(dst, "XADD", k, sid, *fields)
-
-            pttl = cmd(src, "PTTL", k)
-            if isinstance(pttl, int) and pttl > 0:
-                cmd(dst, "PEXPIRE", k, pttl)
-
-    print("sync complete")
+    if args.workers < 1:
+        ap.error("--workers must be at least 1")
+    if args.scan_count < 1:
+        ap.error("--scan-count must be at least 1")
+
+    src_addr = (args.source_host, args.source_port)
+    dst_addr = (args.target_host, args.target_port)
+    with contextlib.ExitStack() as stack:
+        sub = None
+        if args.follow:
+            # Subscribe first so changes made during the initial copy are
+            # queued on this connection rather than lost.
+            sub = subscribe_keyspace(stack.enter_context(connect(src_addr[0], src_addr[1], 5)))
+
+        copy_keyspace(src_addr, dst_addr, 5, args.workers, args.flush_target, args.compat_mode, args.scan_count)
+        print("sync complete", flush=True)
+
+        if sub is not None:
+            try:
+                follow(sub, src_addr, dst_addr, 5, args.compat_mode)
+            except KeyboardInterrupt:
+                print("follow stopped")
     return 0
 
 
@@ -10,66 +10,196 @@ class RespError:
     message: str
 
 
+CRLF = b"\r\n"
+# Pre-rendered RESP headers for the lengths that cover nearly every frame.
+_PREFIX_LUT_SIZE = 4096
+_STAR = [b"*%d\r\n" % i for i in range(_PREFIX_LUT_SIZE)]
+_DOL = [b"$%d\r\n" % i for i in range(_PREFIX_LUT_SIZE)]
+
+
 def encode_command(args: list[str]) -> bytes:
-    out = [f"*{len(args)}\r\n".encode()]
+    n = len(args)
+    out = [_STAR[n] if n < _PREFIX_LUT_SIZE else b"*%d\r\n" % n]
     for arg in args:
         b = arg.encode()
-        out.append(f"${len(b)}\r\n".encode())
-        out.append(b + b"\r\n")
+        n = len(b)
+        out += (_DOL[n] if n < _PREFIX_LUT_SIZE else b"$%d\r\n" % n, b, CRLF)
     return b"".join(out)
 
 
-def _read_exact(sock: socket.socket, n: int) -> bytes:
-    buf = bytearray()
-    while len(buf) < n:
-        chunk = sock.recv(n - len(buf))
+READ_SIZE = 1 << 16
+COMPACT_AT = 1 << 20
+SOCK_BUF = 1 << 20
+
+
+class RespReader:
+    """Buffered reply reader: one ``recv`` refills many lines and bulks."""
+
+    __slots__ = ("sock", "buf", "pos")
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.buf = bytearray()
+        self.pos = 0
+
+    def _fill(self) -> None:
+        if self.pos == len(self.buf):
+            del self.buf[:]
+            self.pos = 0
+        elif self.pos > COMPACT_AT:
+            del self.buf[:self.pos]
+            self.pos = 0
+        chunk = self.sock.recv(READ_SIZE)
         if not chunk:
             raise ConnectionError("socket closed")
-        buf.extend(chunk)
-    return bytes(buf)
+        self.buf += chunk
 
+    def read_line(self) -> bytes:
+        while True:
+            idx = self.buf.find(b"\r\n", self.pos)
+            if idx >= 0:
+                break
+            self._fill()
+        line = self._take(self.pos, idx)
+        self.pos = idx + 2
+        return line
 
-def _read_line(sock: socket.socket) -> bytes:
-    buf = bytearray()
-    while True:
-        c = _read_exact(sock, 1)
-        buf.extend(c)
-        if len(buf) >= 2 and buf[-2:] == b"\r\n":
-            return bytes(buf[:-2])
+    def read_exact(self, n: int) -> bytes:
+        while len(self.buf) - self.pos < n:
+            self._fill()
+        data = self._take(self.pos, self.pos + n)
+        self.pos += n
+        return data
+
+    def read_bulk(self, n: int) -> bytes:
+        """Read an ``n``-byte bulk body and drop its trailing CRLF."""
+        while len(self.buf) - self.pos < n + 2:
+            self._fill()
+        data = self._take(self.pos, self.pos + n)
+        self.pos += n + 2
+        return data
 
+    def _take(self, start: int, end: int) -> bytes:
+        # One copy straight out of the buffer; slicing the bytearray first
+        # would copy twice.  The view is released so the buffer can grow.
+        with memoryview(self.buf) as mv:
+            return mv[start:end].tobytes()
 
-def read_resp(sock: socket.socket):
-    prefix = _read_exact(sock, 1)
+
+def read_resp(reader: RespReader):
+    line = reader.read_line()
+    prefix = line[:1]
     if prefix == b"+":
-        return _read_line(sock).decode()
+        return line[1:].decode()
     if prefix == b"-":
-        return RespError(_read_line(sock).decode())
+        return RespError(line[1:].decode())
     if prefix == b":":
-        return int(_read_line(sock).decode())
+        return int(line[1:])
     if prefix == b"$":
-        n = int(_read_line(sock).decode())
+        n = int(line[1:])
         if n == -1:
             return None
-        data = _read_exact(sock, n)
-        _read_exact(sock, 2)
-        return data.decode()
-    if prefix == b"*":
-        n = int(_read_line(sock).decode())
+        return reader.read_bulk(n).decode()
+    if prefix == b"*" or prefix == b"~":
+        # A RESP3 set (``~``) comes back as a list in server order.
+        n = int(line[1:])
         if n == -1:
             return None
-        return [read_resp(sock) for _ in range(n)]
+        return [read_resp(reader) for _ in range(n)]
     if prefix == b"%":
-        n = int(_read_line(sock).decode())
+        n = int(line[1:])
         out = {}
         for _ in range(n):
-            k = read_resp(sock)
-            v = read_resp(sock)
+            k = read_resp(reader)
+            v = read_resp(reader)
             out[k] = v
         return out
+    # RESP3 scalars, seen once a case switches protocol with HELLO 3.
+    if prefix == b"_":
+        return None
+    if prefix == b"#":
+        return line[1:] == b"t"
+    if prefix == b",":
+        return float(line[1:])
+    if prefix == b"(":
+        return int(line[1:])
+    if prefix == b"=":
+        # Verbatim string: drop the ``txt:``-style format tag.
+        return reader.read_bulk(int(line[1:]))[4:].decode()
+    if prefix == b"!":
+        return RespError(reader.read_bulk(int(line[1:])).decode())
     raise ValueError(f"Unsupported RESP prefix: {prefix!r}")
 
 
+def _connect(host: str, port: int, timeout: float) -> socket.socket:
+    sock = socket.create_connection((host, port), timeout=timeout)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCK_BUF)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCK_BUF)
+    return sock
+
+
+def connect(host: str, port: int, timeout: float = 3.0) -> RespReader:
+    """Open a long-lived connection; close it with ``reader.sock.close()``."""
+    return RespReader(_connect(host, port, timeout))
+
+
+def pipeline(reader: RespReader, commands: list[list[str]]) -> list:
+    """Send ``commands`` in one write and return their replies in order."""
+    if not commands:
+        return []
+    reader.sock.sendall(b"".join(encode_command(c) for c in commands))
+    return [read_resp(reader) for _ in commands]
+
+
+def scan_all(reader: RespReader, count: int = 5000) -> list[str]:
+    """Return every key, sorted, walking SCAN instead of a blocking KEYS *."""
+    keys: set[str] = set()
+    cursor = "0"
+    while True:
+        reply = pipeline(reader, [["SCAN", cursor, "COUNT", str(count)]])[0]
+        if not isinstance(reply, list) or len(reply) != 2:
+            raise ValueError(f"unexpected SCAN reply: {reply!r}")
+        cursor, page = reply
+        keys.update(page or [])
+        if cursor == "0":
+            return sorted(keys)
+
+
+# One cached connection per server, reused by every roundtrip() call.
+# Connection state (SELECT, HELLO 3, MULTI, CLIENT SETNAME, ...) therefore
+# carries over from one command of a case to the next, as it would for a
+# real client; run_diff_tests.py drops the pool between cases.
+_POOL: dict[tuple[str, int], RespReader] = {}
+
+
+def get_conn(host: str, port: int) -> RespReader:
+    reader = _POOL.get((host, port))
+    if reader is None:
+        reader = _POOL[(host, port)] = connect(host, port)
+    return reader
+
+
+def _drop_conn(host: str, port: int) -> None:
+    reader = _POOL.pop((host, port), None)
+    if reader is not None:
+        reader.sock.close()
+
+
+def close_pool() -> None:
+    for host, port in list(_POOL):
+        _drop_conn(host, port)
+
+
 def roundtrip(host: str, port: int, args: list[str]):
-    with socket.create_connection((host, port), timeout=3) as sock:
-        sock.sendall(encode_command(args))
-        return read_resp(sock)
+    reader = get_conn(host, port)
+    try:
+        reader.sock.sendall(encode_command(args))
+        reply = read_resp(reader)
+    except (OSError, ValueError):
+        _drop_conn(host, port)
+        raise
+    if args and args[0].upper() == "QUIT":
+        # The server hangs up after QUIT; the next call reconnects.
+        _drop_conn(host, port)
+    return reply
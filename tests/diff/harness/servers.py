@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+import functools
 import pathlib
 import shutil
 import socket
@@ -10,6 +11,7 @@ import tempfile
 import time
 
 
+@functools.lru_cache(maxsize=None)
 def _find_redis_server(root: pathlib.Path) -> str | None:
     """Locate redis-server: project-local first, then system PATH."""
     local = root / "third_party/redis/src/redis-server"
@@ -38,13 +40,20 @@ class ServerProc:
 
 
 def _wait_ready(host: str, port: int, timeout_sec: float = 8.0) -> None:
+    """Poll with PING, backing off from 1 ms to 50 ms between attempts."""
     deadline = time.time() + timeout_sec
+    delay = 0.001
     while time.time() < deadline:
         try:
-            with socket.create_connection((host, port), timeout=0.5):
-                return
+            with socket.create_connection((host, port), timeout=0.5) as sock:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                sock.sendall(b"*1\r\n$4\r\nPING\r\n")
+                if sock.recv(32).startswith(b"+PONG"):
+                    return
         except OSError:
-            time.sleep(0.05)
+            pass
+        time.sleep(delay)
+        delay = min(delay * 1.5, 0.05)
     raise RuntimeError(f"server did not become ready on {host}:{port}")
 
 
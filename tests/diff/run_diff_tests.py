@@ -7,8 +7,8 @@ import pathlib
 import sys
 from typing import Any
 
-from harness.resp import RespError, roundtrip
-from harness.servers import start_peadb, start_redis
+from harness.resp import RespError, RespReader, close_pool, connect, pipeline, roundtrip, scan_all
+from harness.servers import ServerProc, start_peadb, start_redis
 
 
 def normalize(v: Any) -> Any:
@@ -21,24 +21,30 @@ def normalize(v: Any) -> Any:
     return v
 
 
-def compare_state(host_a: str, port_a: int, host_b: str, port_b: int) -> list[str]:
+def compare_state(conn_a: RespReader, conn_b: RespReader) -> list[str]:
     mismatches: list[str] = []
 
-    keys_a = sorted(roundtrip(host_a, port_a, ["KEYS", "*"]) or [])
-    keys_b = sorted(roundtrip(host_b, port_b, ["KEYS", "*"]) or [])
+    keys_a = scan_all(conn_a)
+    keys_b = scan_all(conn_b)
 
     if normalize(keys_a) != normalize(keys_b):
         mismatches.append(f"keys mismatch: {normalize(keys_a)} != {normalize(keys_b)}")
         return mismatches
 
-    for key in (keys_a or []):
-        ta = normalize(roundtrip(host_a, port_a, ["TYPE", key]))
-        tb = normalize(roundtrip(host_b, port_b, ["TYPE", key]))
+    # One write per server for all TYPEs, then one for all PTTLs.
+    types_a = pipeline(conn_a, [["TYPE", key] for key in keys_a])
+    types_b = pipeline(conn_b, [["TYPE", key] for key in keys_a])
+    ttls_a = pipeline(conn_a, [["PTTL", key] for key in keys_a])
+    ttls_b = pipeline(conn_b, [["PTTL", key] for key in keys_a])
+
+    for key, ta, tb, ttla, ttlb in zip(keys_a, types_a, types_b, ttls_a, ttls_b):
+        ta = normalize(ta)
+        tb = normalize(tb)
         if ta != tb:
             mismatches.append(f"type mismatch for key {key!r}: {ta} != {tb}")
 
-        ttla = normalize(roundtrip(host_a, port_a, ["PTTL", key]))
-        ttlb = normalize(roundtrip(host_b, port_b, ["PTTL", key]))
+        ttla = normalize(ttla)
+        ttlb = normalize(ttlb)
         if isinstance(ttla, int) and isinstance(ttlb, int):
             # Allow slight drift if both are expiring keys.
             if ttla >= 0 and ttlb >= 0 and abs(ttla - ttlb) > 50:
@@ -51,24 +57,25 @@ def compare_state(host_a: str, port_a: int, host_b: str, port_b: int) -> list[st
     return mismatches
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--case", default="tests/diff/basic/ping_echo_quit.json")
-    parser.add_argument("--redis-port", type=int, default=6392)
-    parser.add_argument("--peadb-port", type=int, default=6393)
-    args = parser.parse_args()
+DEFAULT_CASE = "tests/diff/basic/ping_echo_quit.json"
 
-    root = pathlib.Path(__file__).resolve().parents[2]
-    commands = json.loads((root / args.case).read_text(encoding="utf-8"))
 
-    redis = start_redis(root, args.redis_port)
-    peadb = start_peadb(root, args.peadb_port)
+def run_case(
+    root: pathlib.Path, case: str, redis: ServerProc, peadb: ServerProc
+) -> tuple[list[str], list[str]]:
+    """Replay one case file against both servers; return (mismatches, repro lines)."""
+    commands = json.loads((root / case).read_text(encoding="utf-8"))
 
     mismatches: list[str] = []
     repro_lines: list[str] = []
 
-    try:
-      for cmd in commands:
+    # Every case starts from an empty keyspace on fresh connections, so cases
+    # sharing one pair of servers cannot see each other's keys or SELECTs.
+    close_pool()
+    roundtrip(redis.host, redis.port, ["FLUSHALL"])
+    roundtrip(peadb.host, peadb.port, ["FLUSHALL"])
+
+    for cmd in commands:
         repro_lines.append(" ".join(cmd))
         r1 = normalize(roundtrip(redis.host, redis.port, cmd))
         r2 = normalize(roundtrip(peadb.host, peadb.port, cmd))
@@ -81,10 +88,47 @@ def main() -> int:
         if r1 != r2:
             mismatches.append(f"reply mismatch for {cmd}: redis={r1} peadb={r2}")
 
-      mismatches.extend(compare_state(redis.host, redis.port, peadb.host, peadb.port))
+    conn_a = connect(redis.host, redis.port)
+    conn_b = connect(peadb.host, peadb.port)
+    try:
+        mismatches.extend(compare_state(conn_a, conn_b))
+    finally:
+        conn_a.sock.close()
+        conn_b.sock.close()
+    return mismatches, repro_lines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--case",
+        action="append",
+        help=f"case file to replay (default: {DEFAULT_CASE}); repeat to run "
+             "several against one pair of servers",
+    )
+    parser.add_argument("--redis-port", type=int, default=6392)
+    parser.add_argument("--peadb-port", type=int, default=6393)
+    args = parser.parse_args()
+
+    root = pathlib.Path(__file__).resolve().parents[2]
+    cases = args.case or [DEFAULT_CASE]
+
+    redis = start_redis(root, args.redis_port)
+    peadb = start_peadb(root, args.peadb_port)
+
+    mismatches: list[str] = []
+    repro_lines: list[str] = []
+
+    try:
+        for case in cases:
+            case_mismatches, case_repro = run_case(root, case, redis, peadb)
+            if case_mismatches:
+                mismatches.extend(f"{case}: {m}" for m in case_mismatches)
+                repro_lines.extend(case_repro)
     finally:
-      redis.stop()
-      peadb.stop()
+        close_pool()
+        redis.stop()
+        peadb.stop()
 
     if mismatches:
         out = root / "tests/diff/last_repro.txt"
@@ -95,7 +139,7 @@ def main() -> int:
         print(f"Repro saved to {out}", file=sys.stderr)
         return 1
 
-    print("Differential tests passed")
+    print(f"Differential tests passed ({len(cases)} case(s))")
     return 0
 
 
@@ -0,0 +1,38 @@
+"""Shared helper: compile the tiny test modules used by the m8 tests.
+
+``build_module(name, source)`` returns the path of a shared object built from
+``source`` with ``g++ -shared -fPIC -O2``.  The build is cached under
+``<tmp>/peadb_modcache`` by a hash of the source and flags, so only the first
+run after a source change pays for the compiler.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import pathlib
+import subprocess
+import tempfile
+
+CXXFLAGS = ["-shared", "-fPIC", "-O2"]
+CACHE_DIR = pathlib.Path(tempfile.gettempdir()) / "peadb_modcache"
+
+
+def build_module(name: str, source: str) -> pathlib.Path:
+    """Return a cached ``<hash>/<name>.so`` compiled from ``source``.
+
+    The file keeps its plain name because the server derives the module
+    name (MODULE LIST / UNLOAD) from it.
+    """
+    key = hashlib.sha256("\0".join([*CXXFLAGS, source]).encode()).hexdigest()[:16]
+    so = CACHE_DIR / key / f"{name}.so"
+    if so.exists():
+        return so
+    so.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=so.parent) as td:
+        cpp = pathlib.Path(td) / f"{name}.cpp"
+        out = pathlib.Path(td) / f"{name}.so"
+        cpp.write_text(source, encoding="utf-8")
+        subprocess.check_call(["g++", *CXXFLAGS, str(cpp), "-o", str(out)])
+        # Atomic, so tests running side by side never load a partial file.
+        os.replace(out, so)
+    return so
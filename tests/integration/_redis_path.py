@@ -11,6 +11,7 @@ test that requires these binaries; they will print a SKIP message and
 """
 from __future__ import annotations
 
+import functools
 import pathlib
 import shutil
 import sys
@@ -21,6 +22,7 @@ _THIRD_PARTY_SERVER = ROOT / "third_party/redis/src/redis-server"
 _THIRD_PARTY_CLI = ROOT / "third_party/redis/src/redis-cli"
 
 
+@functools.lru_cache(maxsize=None)
 def redis_server_path() -> str | None:
     """Return absolute path to redis-server, or None."""
     if _THIRD_PARTY_SERVER.exists():
@@ -29,6 +31,7 @@ def redis_server_path() -> str | None:
     return found
 
 
+@functools.lru_cache(maxsize=None)
 def redis_cli_path() -> str | None:
     """Return absolute path to redis-cli, or None."""
     if _THIRD_PARTY_CLI.exists():
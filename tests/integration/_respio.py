@@ -0,0 +1,446 @@
+"""Shared helper: RESP client, free ports and server start-up for the
+integration tests.
+
+``cmd(sock, *args)`` sends one command of ``str`` arguments and returns its
+decoded reply; ``cmd_mixed`` also accepts ``bytes`` arguments, and
+``pipeline`` sends a batch of ``str`` commands in one write.  Requests go out as an
+iovec (``send_command``); replies come through ``reader(sock)``, where one
+``recv`` of up to 64 KiB serves many reply lines and bulk bodies.
+
+Replies decode as: simple strings and bulks -> ``str`` (bulks stay
+``bytes`` with ``raw=True``, e.g. for DUMP payloads), integers -> ``int``,
+errors -> ``("ERR", message)``, nulls -> ``None``, arrays -> ``list``,
+RESP3 maps -> ``dict`` (array keys become tuples).
+"""
+from __future__ import annotations
+
+import os
+import select
+import signal
+import socket
+import subprocess
+import time
+import weakref
+
+READ_SIZE = 1 << 16
+# Most buffers one sendmsg call accepts (Linux UIO_MAXIOV).
+IOV_MAX = 1024
+# Set by run_integration_tests.sh under SHARED_SERVER=1: the port of one
+# peadb-server that every test using free_port()/start_server() talks to.
+SHARED_PORT = int(os.environ.get("PEADB_SHARED_PORT") or 0)
+
+
+class RespReader:
+    """Buffered line/exact reader over a connected socket.
+
+    Replies are received with ``recv_into`` into one reusable READ_SIZE
+    buffer; ``lo:hi`` is the unread window, compacted to the front when
+    more data is needed.
+    """
+
+    __slots__ = ("sock", "buf", "mv", "lo", "hi")
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.buf = bytearray(READ_SIZE)
+        self.mv = memoryview(self.buf)
+        self.lo = self.hi = 0
+
+    def _fill(self) -> None:
+        lo, hi = self.lo, self.hi
+        if lo:
+            self.buf[:hi - lo] = self.buf[lo:hi]
+            self.hi = hi = hi - lo
+            self.lo = 0
+        if hi == len(self.buf):
+            # A single line longer than the buffer: grow it.
+            self.mv.release()
+            self.buf += bytes(len(self.buf))
+            self.mv = memoryview(self.buf)
+        k = self.sock.recv_into(self.mv[hi:])
+        if not k:
+            raise RuntimeError("connection closed")
+        self.hi = hi + k
+
+    def read_line(self) -> bytes:
+        """Return the next line without its CRLF."""
+        while True:
+            idx = self.buf.find(b"\r\n", self.lo, self.hi)
+            if idx >= 0:
+                break
+            self._fill()
+        line = bytes(self.mv[self.lo:idx])
+        self.lo = idx + 2
+        return line
+
+    def read_exact(self, n: int) -> bytes:
+        have = self.hi - self.lo
+        if have < n and n > len(self.buf):
+            return self._read_large(n, have)
+        while self.hi - self.lo < n:
+            self._fill()
+        b = bytes(self.mv[self.lo:self.lo + n])
+        self.lo += n
+        return b
+
+    def read_value(self, raw: bool = False):
+        """Decode one reply without recursing into nested arrays and maps.
+
+        ``stack`` holds ``[items, remaining, is_map]`` for each container
+        still being filled; a map collects keys and values alternately and
+        becomes a ``dict`` once complete.
+        """
+        stack = []
+        while True:
+            line = self.read_line()
+            p = line[:1]
+            if p == b"+":
+                v = line[1:].decode()
+            elif p == b"-":
+                v = ("ERR", line[1:].decode())
+            elif p == b":":
+                v = int(line[1:])
+            elif p == b"$":
+                n = int(line[1:])
+                if n == -1:
+                    v = None
+                else:
+                    v = self.read_exact(n + 2)[:-2]
+                    if not raw:
+                        v = v.decode()
+            elif p == b"*" or p == b"%":
+                n = int(line[1:])
+                if n == -1:
+                    v = None
+                else:
+                    is_map = p == b"%"
+                    if is_map:
+                        n *= 2
+                    if n:
+                        stack.append([[], n, is_map])
+                        continue
+                    v = {} if is_map else []
+            elif p == b"_":
+                v = None
+            else:
+                raise RuntimeError(f"unsupported reply {line!r}")
+            while stack:
+                top = stack[-1]
+                top[0].append(v)
+                top[1] -= 1
+                if top[1]:
+                    break
+                items, _, is_map = stack.pop()
+                if is_map:
+                    it = iter(items)
+                    v = {(tuple(k) if isinstance(k, list) else k): val for k, val in zip(it, it)}
+                else:
+                    v = items
+            else:
+                return v
+
+    def _read_large(self, n: int, have: int) -> bytes:
+        # Large bulks (e.g. DUMP payloads) go straight into one preallocated
+        # buffer via recv_into instead of through the read buffer.
+        out = bytearray(n)
+        out[:have] = self.mv[self.lo:self.hi]
+        self.lo = self.hi = 0
+        mv = memoryview(out)
+        got = have
+        while got < n:
+            k = self.sock.recv_into(mv[got:], n - got)
+            if not k:
+                raise RuntimeError("connection closed")
+            got += k
+        return bytes(out)
+
+
+_READERS: "weakref.WeakKeyDictionary[socket.socket, RespReader]" = weakref.WeakKeyDictionary()
+
+
+def reader(sock: socket.socket) -> RespReader:
+    """Return the RespReader for ``sock``, creating it on first use."""
+    r = _READERS.get(sock)
+    if r is None:
+        # A proxy, so the cached reader does not keep its socket alive.
+        r = _READERS[sock] = RespReader(weakref.proxy(sock))
+    return r
+
+
+def read_reply(sock: socket.socket, raw: bool = False):
+    """Read and decode one reply from ``sock`` (see the module docstring)."""
+    return reader(sock).read_value(raw)
+
+
+def read_rdb(sock: socket.socket) -> bytes:
+    """Read the ``$<len>\\r\\n<payload>`` RDB transfer that follows SYNC/PSYNC.
+
+    Unlike a bulk reply it has no trailing CRLF, so the replication stream
+    starts right after the payload.
+    """
+    r = reader(sock)
+    line = r.read_line()
+    if line[:1] != b"$":
+        raise RuntimeError(f"expected RDB transfer, got {line!r}")
+    return r.read_exact(int(line[1:]))
+
+
+# Pre-rendered ``*n`` / ``$n`` headers for small counts, as in the diff
+# harness; kept short since every test pays for building them at import.
+_PREFIX_LUT_SIZE = 64
+_STAR = [b"*%d\r\n" % i for i in range(_PREFIX_LUT_SIZE)]
+_DOL = [b"$%d\r\n" % i for i in range(_PREFIX_LUT_SIZE)]
+
+# Encoded ``$len\r\n<arg>\r\n`` chunks for short str arguments (command
+# names, "0", "COUNT", ...), FIFO-evicted past _BULK_CACHE_SIZE entries.
+_BULK_CACHE_SIZE = 256
+_BULK_CACHE_MAX_LEN = 32
+_bulk_cache: dict[str, bytes] = {}
+
+
+def _str_chunk(a: str) -> bytes:
+    chunk = _bulk_cache.get(a)
+    if chunk is None:
+        b = a.encode()
+        chunk = b"$%d\r\n%s\r\n" % (len(b), b)
+        if len(a) <= _BULK_CACHE_MAX_LEN:
+            if len(_bulk_cache) >= _BULK_CACHE_SIZE:
+                del _bulk_cache[next(iter(_bulk_cache))]
+            _bulk_cache[a] = chunk
+    return chunk
+
+
+def _frame_parts(args) -> list:
+    # All-str fast path: one chunk per argument, no per-argument type check.
+    n = len(args)
+    parts = [_STAR[n] if n < _PREFIX_LUT_SIZE else b"*%d\r\n" % n]
+    parts += map(_str_chunk, args)
+    return parts
+
+
+def _frame_parts_mixed(args) -> list:
+    # ``bytes`` arguments go out as their own buffer, never copied.
+    n = len(args)
+    parts = [_STAR[n] if n < _PREFIX_LUT_SIZE else b"*%d\r\n" % n]
+    for a in args:
+        if isinstance(a, str):
+            parts.append(_str_chunk(a))
+        else:
+            size = len(a)
+            parts.append(_DOL[size] if size < _PREFIX_LUT_SIZE else b"$%d\r\n" % size)
+            parts.append(a)
+            parts.append(b"\r\n")
+    return parts
+
+
+def encode_command(args) -> bytes:
+    """Encode ``args`` (``str`` or ``bytes``) as one RESP array frame."""
+    return b"".join(_frame_parts_mixed(args))
+
+
+def _send_parts(sock: socket.socket, parts: list) -> None:
+    if not hasattr(sock, "sendmsg"):
+        sock.sendall(b"".join(parts))
+        return
+    i, n = 0, len(parts)
+    while i < n:
+        batch = parts[i:i + IOV_MAX]
+        sent = sock.sendmsg(batch)
+        for buf in batch:
+            size = len(buf)
+            if sent < size:
+                parts[i] = memoryview(buf)[sent:]
+                break
+            sent -= size
+            i += 1
+
+
+def send_command(sock: socket.socket, args, mixed: bool = False) -> None:
+    """Send ``args`` as one RESP frame without joining it first.
+
+    The frame goes out as an iovec through ``sendmsg`` (at most IOV_MAX
+    buffers per call, resuming after short writes), so a large ``bytes``
+    argument such as a DUMP payload is never copied into a joined buffer.
+    Falls back to ``sendall`` where ``sendmsg`` is unavailable.
+
+    ``args`` must all be ``str`` unless ``mixed`` is set.
+    """
+    _send_parts(sock, (_frame_parts_mixed if mixed else _frame_parts)(args))
+
+
+class PreparedCmd:
+    """A command whose leading arguments are encoded once.
+
+    ``PreparedCmd("XADD", "st", "*")`` keeps the ``XADD st *`` bulks ready;
+    each ``send(sock, "f", "v")`` only encodes the trailing arguments.
+    """
+
+    __slots__ = ("head", "nfixed")
+
+    def __init__(self, *fixed) -> None:
+        self.head = b"".join(_frame_parts_mixed(fixed)[1:])
+        self.nfixed = len(fixed)
+
+    def send(self, sock: socket.socket, *args) -> None:
+        parts = _frame_parts(args)
+        n = self.nfixed + len(args)
+        parts[0] = _STAR[n] if n < _PREFIX_LUT_SIZE else b"*%d\r\n" % n
+        parts.insert(1, self.head)
+        _send_parts(sock, parts)
+
+
+def cmd(sock: socket.socket, *args, raw: bool = False):
+    """Send one command of ``str`` arguments and return its decoded reply."""
+    send_command(sock, args)
+    return read_reply(sock, raw)
+
+
+def cmd_mixed(sock: socket.socket, *args, raw: bool = False):
+    """Like ``cmd``, but arguments may also be ``bytes`` (DUMP payloads)."""
+    send_command(sock, args, mixed=True)
+    return read_reply(sock, raw)
+
+
+def pipeline(sock: socket.socket, cmds, raw: bool = False) -> list:
+    """Send every command in ``cmds`` (``str`` arguments only) in one write,
+    then read one reply each."""
+    sock.sendall(b"".join(b"".join(_frame_parts(c)) for c in cmds))
+    return [read_reply(sock, raw) for _ in cmds]
+
+
+def fanout(calls, raw: bool = False) -> list:
+    """Send each ``(sock, args)`` command in ``calls``, then read the replies.
+
+    Every request is on the wire before the first reply is awaited, so
+    commands to different servers run concurrently and the wait is the
+    slowest reply rather than the sum of them.
+    """
+    for sock, args in calls:
+        send_command(sock, args)
+    return [read_reply(sock, raw) for sock, _ in calls]
+
+
+def connect(port: int, timeout: float = 2.0) -> socket.socket:
+    """Connect to 127.0.0.1:``port`` with TCP_NODELAY set."""
+    sock = socket.create_connection(("127.0.0.1", port), timeout=timeout)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+def free_port(shared: bool = True) -> int:
+    """Return the port for this test's server.
+
+    That is the runner's shared server when SHARED_PORT is set, otherwise a
+    localhost port that is free right now, so tests can run side by side
+    (``JOBS`` in ``scripts/ci/run_integration_tests.sh``).  Pass
+    ``shared=False`` for a server the test must own, e.g. one of a pair or
+    one whose state must not leak into later tests.
+    """
+    if shared and SHARED_PORT:
+        return SHARED_PORT
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class _SharedServer:
+    """Stands in for the Popen of the runner's shared server: never exits,
+    and terminate()/wait() leave it running for the next test."""
+
+    def poll(self):
+        return None
+
+    def terminate(self) -> None:
+        pass
+
+    def wait(self, timeout=None) -> int:
+        return 0
+
+
+class _Server(subprocess.Popen):
+    """A test's own peadb-server, torn down without waiting on its shutdown.
+
+    terminate() sends SIGKILL, so shutdown never depends on how quickly the
+    server handles SIGTERM.  wait() is the normal ``Popen.wait``: reaping a
+    killed child takes microseconds, and callers that restart on the same
+    port rely on the old process being gone when it returns.
+    """
+
+    def terminate(self) -> None:
+        self.send_signal(signal.SIGKILL)
+
+
+def start_server(binary, port: int):
+    """Start ``binary`` (a peadb-server) on 127.0.0.1:``port``.
+
+    ``close_fds=False`` lets CPython launch it with ``os.posix_spawn``
+    instead of fork+exec; our own descriptors are non-inheritable anyway.
+    Under SHARED_PORT nothing is started and the shared server is reused.
+    """
+    if SHARED_PORT and port == SHARED_PORT:
+        return _SharedServer()
+    argv = [str(binary), "--port", str(port), "--bind", "127.0.0.1", "--loglevel", "error"]
+    return _Server(argv, close_fds=False)
+
+
+def wait_ready(port: int, proc: subprocess.Popen, secs: float = 3.0) -> None:
+    """Poll until the server on ``port`` accepts connections.
+
+    Probes start 1 ms apart and back off to 50 ms, so a server that is up
+    within a few milliseconds is not held to a fixed sleep after ``Popen``.
+    Fails fast if ``proc`` exits first.  (Tests run peadb-server with
+    ``--loglevel error``, which hides its "listening on" line, so there is
+    no ready banner to wait for; the probe also works for redis-server.)
+    """
+    end = time.time() + secs
+    dt = 0.001
+    while time.time() < end:
+        if proc.poll() is not None:
+            raise RuntimeError("server exited before becoming ready")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.05):
+                return
+        except OSError:
+            time.sleep(dt)
+            dt = min(dt * 2, 0.05)
+    raise RuntimeError("server did not become ready in time")
+
+
+def wait_until(pred, secs: float = 3.0) -> bool:
+    """Poll ``pred()`` until it is true or ``secs`` pass, and return whether
+    it became true.
+
+    Polls start 1 ms apart and back off to 50 ms, so state that converges
+    in a few milliseconds (replication, gossip) is seen almost at once.
+    """
+    end = time.time() + secs
+    dt = 0.001
+    while True:
+        if pred():
+            return True
+        if time.time() >= end:
+            return False
+        time.sleep(dt)
+        dt = min(dt * 1.5, 0.05)
+
+
+def stop(proc: subprocess.Popen, deadline: float = 3.0) -> None:
+    """Terminate ``proc`` and wait for it to exit.
+
+    The wait blocks in ``poll`` on a pidfd (``os.pidfd_open``, Linux 5.3+),
+    which wakes as soon as the child exits, rather than in the sleep-and-retry
+    loop of ``Popen.wait(timeout)``; without pidfds it falls back to the latter.
+    """
+    proc.terminate()
+    try:
+        fd = os.pidfd_open(proc.pid)
+    except (AttributeError, OSError):
+        pass
+    else:
+        try:
+            poller = select.poll()
+            poller.register(fd, select.POLLIN)
+            poller.poll(deadline * 1000)
+        finally:
+            os.close(fd)
+    proc.wait(timeout=deadline)
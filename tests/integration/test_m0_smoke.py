@@ -4,32 +4,47 @@ import socket
 import subprocess
 import time
 
+from _respio import free_port, stop
+
 ROOT = pathlib.Path(__file__).resolve().parents[2]
 
 
-def send_resp_ping(port: int) -> bytes:
-    with socket.create_connection(("127.0.0.1", port), timeout=2) as s:
-        s.sendall(b"*1\r\n$4\r\nPING\r\n")
-        return s.recv(128)
+def wait_for_pong(port: int, deadline: float) -> bool:
+    """PING over one connection, reconnecting only if it fails or drops."""
+    sock = None
+    delay = 0.001
+    try:
+        while time.time() < deadline:
+            try:
+                if sock is None:
+                    sock = socket.create_connection(("127.0.0.1", port), timeout=2)
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                sock.sendall(b"*1\r\n$4\r\nPING\r\n")
+                if sock.recv(128) == b"+PONG\r\n":
+                    return True
+            except OSError:
+                if sock is not None:
+                    sock.close()
+                    sock = None
+            time.sleep(delay)
+            delay = min(delay * 1.5, 0.05)
+        return False
+    finally:
+        if sock is not None:
+            sock.close()
 
 
 def main() -> int:
     server = ROOT / "peadb-server"
-    proc = subprocess.Popen([str(server), "--port", "6391", "--bind", "127.0.0.1", "--loglevel", "error"])
+    port = free_port(shared=False)
+    proc = subprocess.Popen([str(server), "--port", str(port), "--bind", "127.0.0.1", "--loglevel", "error"])
     try:
-        deadline = time.time() + 5
-        while time.time() < deadline:
-            try:
-                out = send_resp_ping(6391)
-                if out == b"+PONG\r\n":
-                    print("M0 smoke passed")
-                    return 0
-            except OSError:
-                time.sleep(0.1)
+        if wait_for_pong(port, time.time() + 5):
+            print("M0 smoke passed")
+            return 0
         raise RuntimeError("server did not return PONG")
     finally:
-        proc.terminate()
-        proc.wait(timeout=3)
+        stop(proc)
 
 
 if __name__ == "__main__":
@@ -1,47 +1,17 @@
 #!/usr/bin/env python3
 import pathlib
-import socket
-import subprocess
-import time
-
-ROOT = pathlib.Path(__file__).resolve().parents[2]
 
+from _respio import cmd, connect, free_port, start_server, wait_ready
 
-def cmd(sock: socket.socket, *args: str):
-    data = f"*{len(args)}\r\n".encode()
-    for a in args:
-        b = a.encode()
-        data += f"${len(b)}\r\n".encode() + b + b"\r\n"
-    sock.sendall(data)
-
-    p = sock.recv(1)
-    def line():
-      b = bytearray()
-      while True:
-        b.extend(sock.recv(1))
-        if b[-2:] == b"\r\n":
-          return bytes(b[:-2])
-    if p == b"+":
-      return line().decode()
-    if p == b":":
-      return int(line())
-    if p == b"$":
-      n = int(line())
-      if n == -1:
-        return None
-      b = sock.recv(n)
-      sock.recv(2)
-      return b.decode()
-    if p == b"-":
-      return ("ERR", line().decode())
-    raise RuntimeError(p)
+ROOT = pathlib.Path(__file__).resolve().parents[2]
 
 
 def main() -> int:
-    proc = subprocess.Popen([str(ROOT / "peadb-server"), "--port", "6396", "--bind", "127.0.0.1", "--loglevel", "error"])
+    port = free_port()
+    proc = start_server(ROOT / "peadb-server", port)
     try:
-        time.sleep(0.2)
-        with socket.create_connection(("127.0.0.1", 6396), timeout=2) as s:
+        wait_ready(port, proc)
+        with connect(port) as s:
             assert cmd(s, "FLUSHALL") == "OK"
             assert cmd(s, "OBJECT", "ENCODING", "missing") is None
             assert cmd(s, "SET", "short", "abc") == "OK"
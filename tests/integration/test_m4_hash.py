@@ -1,87 +1,44 @@
 #!/usr/bin/env python3
 import pathlib
-import socket
-import subprocess
-import time
 
-ROOT = pathlib.Path(__file__).resolve().parents[2]
-
-
-def read_exact(s: socket.socket, n: int) -> bytes:
-    b = bytearray()
-    while len(b) < n:
-        c = s.recv(n - len(b))
-        if not c:
-            raise RuntimeError("closed")
-        b.extend(c)
-    return bytes(b)
-
-
-def read_line(s: socket.socket) -> bytes:
-    b = bytearray()
-    while True:
-        b.extend(read_exact(s, 1))
-        if b[-2:] == b"\r\n":
-            return bytes(b[:-2])
+from _respio import cmd, connect, free_port, pipeline, start_server, wait_ready
 
-
-def recv(s: socket.socket):
-    p = read_exact(s, 1)
-    if p == b"+":
-      return read_line(s).decode()
-    if p == b"-":
-      return ("ERR", read_line(s).decode())
-    if p == b":":
-      return int(read_line(s).decode())
-    if p == b"$":
-      n = int(read_line(s).decode())
-      if n == -1:
-        return None
-      b = read_exact(s, n)
-      read_exact(s, 2)
-      return b.decode()
-    if p == b"*":
-      n = int(read_line(s).decode())
-      return [recv(s) for _ in range(n)]
-    raise RuntimeError(p)
-
-
-def cmd(s: socket.socket, *args: str):
-    data = f"*{len(args)}\r\n".encode()
-    for a in args:
-      b = a.encode()
-      data += f"${len(b)}\r\n".encode() + b + b"\r\n"
-    s.sendall(data)
-    return recv(s)
+ROOT = pathlib.Path(__file__).resolve().parents[2]
 
 
 def main() -> int:
-    proc = subprocess.Popen([str(ROOT / "peadb-server"), "--port", "6398", "--bind", "127.0.0.1", "--loglevel", "error"])
+    port = free_port()
+    proc = start_server(ROOT / "peadb-server", port)
     try:
-      time.sleep(0.2)
-      with socket.create_connection(("127.0.0.1", 6398), timeout=2) as s:
+      wait_ready(port, proc)
+      with connect(port) as s:
         assert cmd(s, "FLUSHALL") == "OK"
 
-        assert cmd(s, "HSET", "h", "f1", "v1") == 1
-        assert cmd(s, "HSET", "h", "f1", "v2", "f2", "v3") == 1
-        assert cmd(s, "HGET", "h", "f1") == "v2"
-        assert cmd(s, "HEXISTS", "h", "f2") == 1
-        assert cmd(s, "HLEN", "h") == 2
-        allv = cmd(s, "HGETALL", "h")
+        *replies, allv = pipeline(s, [
+          ("HSET", "h", "f1", "v1"),
+          ("HSET", "h", "f1", "v2", "f2", "v3"),
+          ("HGET", "h", "f1"),
+          ("HEXISTS", "h", "f2"),
+          ("HLEN", "h"),
+          ("TYPE", "h"),
+          ("OBJECT", "ENCODING", "h"),
+          ("HGETALL", "h"),
+        ])
+        assert replies == [1, 1, "v2", 1, 2, "hash", "listpack"]
         assert isinstance(allv, list) and len(allv) == 4
-        assert cmd(s, "TYPE", "h") == "hash"
-        assert cmd(s, "OBJECT", "ENCODING", "h") == "listpack"
 
         scan = cmd(s, "HSCAN", "h", "0", "COUNT", "10")
         assert isinstance(scan, list) and len(scan) == 2
         assert scan[0] == "0"
         assert isinstance(scan[1], list)
 
-        assert cmd(s, "HDEL", "h", "f1") == 1
-        assert cmd(s, "HGET", "h", "f1") is None
-
-        assert cmd(s, "SET", "s", "x") == "OK"
-        w = cmd(s, "HGET", "s", "f")
+        *replies, w = pipeline(s, [
+          ("HDEL", "h", "f1"),
+          ("HGET", "h", "f1"),
+          ("SET", "s", "x"),
+          ("HGET", "s", "f"),
+        ])
+        assert replies == [1, None, "OK"]
         assert w[0] == "ERR" and "WRONGTYPE" in w[1]
 
       print("M4 hash tests passed")
@@ -1,54 +1,21 @@
 #!/usr/bin/env python3
-import pathlib,socket,subprocess,tempfile,time
+import pathlib,subprocess,tempfile
+from _respio import cmd, connect, free_port, pipeline, stop, wait_ready, wait_until
 ROOT=pathlib.Path(__file__).resolve().parents[2]
 
-def rx(s,n):
- b=b''
- while len(b)<n:
-  c=s.recv(n-len(b))
-  if not c: raise RuntimeError('closed')
-  b+=c
- return b
-
-def rl(s):
- b=b''
- while not b.endswith(b'\r\n'):
-  b+=rx(s,1)
- return b[:-2]
-
-def recv(s):
- p=rx(s,1)
- if p==b'+': return rl(s).decode()
- if p==b'-': return ('ERR',rl(s).decode())
- if p==b':': return int(rl(s))
- if p==b'$':
-  n=int(rl(s));
-  if n==-1:return None
-  v=rx(s,n); rx(s,2); return v.decode()
- if p==b'*':
-  n=int(rl(s));
-  if n==-1:return None
-  return [recv(s) for _ in range(n)]
- raise RuntimeError(p)
-
-def cmd(s,*a):
- d=f"*{len(a)}\r\n".encode()
- for x in a:
-  b=x.encode(); d+=f"${len(b)}\r\n".encode()+b+b"\r\n"
- s.sendall(d); return recv(s)
-
-def start(cfg):
+def start(cfg,port):
  p=subprocess.Popen([str(ROOT/'peadb-server'),'--config',str(cfg)])
- time.sleep(0.25)
+ wait_ready(port,p)
  return p
 
 def main():
  with tempfile.TemporaryDirectory(prefix='peadb-aof-') as td:
   tdp=pathlib.Path(td)
+  port=free_port(shared=False)
   cfg=tdp/'aof.conf'
   cfg.write_text('\n'.join([
    'bind 127.0.0.1',
-   'port 6411',
+   f'port {port}',
    f'dir {td}',
    'dbfilename dump.rdb',
    'appendonly yes',
@@ -56,28 +23,30 @@ def main():
    'loglevel error',
   ])+'\n',encoding='utf-8')
 
-  p=start(cfg)
+  p=start(cfg,port)
   try:
-   with socket.create_connection(('127.0.0.1',6411),timeout=2) as s:
-    assert cmd(s,'FLUSHALL')=='OK'
-    assert cmd(s,'SET','k','v')=='OK'
-    assert cmd(s,'HSET','h','f','x')==1
-    assert cmd(s,'RPUSH','l','a','b')==2
-    assert cmd(s,'BGREWRITEAOF')=='Background append only file rewriting started'
+   with connect(port) as s:
+    assert pipeline(s,[
+     ('FLUSHALL',),
+     ('SET','k','v'),
+     ('HSET','h','f','x'),
+     ('RPUSH','l','a','b'),
+     ('BGREWRITEAOF',),
+    ])==['OK','OK',1,2,'Background append only file rewriting started']
+    # Stop only once the rewrite has finished, not after an implicit delay.
+    assert wait_until(lambda: 'aof_rewrite_in_progress:0' in cmd(s,'INFO','persistence'))
   finally:
-   p.terminate(); p.wait(timeout=3)
+   stop(p)
 
   aof=tdp/'appendonly.aof'
   assert aof.exists() and aof.stat().st_size>0
 
-  p2=start(cfg)
+  p2=start(cfg,port)
   try:
-   with socket.create_connection(('127.0.0.1',6411),timeout=2) as s2:
-    assert cmd(s2,'GET','k')=='v'
-    assert cmd(s2,'HGET','h','f')=='x'
-    assert cmd(s2,'LRANGE','l','0','-1')==['a','b']
+   with connect(port) as s2:
+    assert pipeline(s2,[('GET','k'),('HGET','h','f'),('LRANGE','l','0','-1')])==['v','x',['a','b']]
   finally:
-   p2.terminate(); p2.wait(timeout=3)
+   stop(p2)
 
  print('M5 AOF tests passed')
  return 0
@@ -1,56 +1,23 @@
 #!/usr/bin/env python3
-import pathlib,socket,subprocess,tempfile,time
+import pathlib,subprocess,tempfile
+from _respio import cmd, connect, free_port, stop, wait_ready
 ROOT=pathlib.Path(__file__).resolve().parents[2]
 
-def rx(s,n):
- b=b''
- while len(b)<n:
-  c=s.recv(n-len(b))
-  if not c: raise RuntimeError('closed')
-  b+=c
- return b
-
-def rl(s):
- b=b''
- while not b.endswith(b'\r\n'):
-  b+=rx(s,1)
- return b[:-2]
-
-def recv(s):
- p=rx(s,1)
- if p==b'+': return rl(s).decode()
- if p==b'-': return ('ERR',rl(s).decode())
- if p==b':': return int(rl(s))
- if p==b'$':
-  n=int(rl(s));
-  if n==-1:return None
-  v=rx(s,n); rx(s,2); return v.decode()
- if p==b'*':
-  n=int(rl(s));
-  if n==-1:return None
-  return [recv(s) for _ in range(n)]
- raise RuntimeError(p)
-
-def cmd(s,*a):
- d=f"*{len(a)}\r\n".encode()
- for x in a:
-  b=x.encode(); d+=f"${len(b)}\r\n".encode()+b+b"\r\n"
- s.sendall(d); return recv(s)
-
 def main():
  with tempfile.TemporaryDirectory(prefix='peadb-m5cmd-') as td:
+  port=free_port(shared=False)
   cfg=pathlib.Path(td)/'p.conf'
   cfg.write_text('\n'.join([
    'bind 127.0.0.1',
-   'port 6410',
+   f'port {port}',
    f'dir {td}',
    'dbfilename dump.rdb',
    'loglevel error',
   ])+'\n',encoding='utf-8')
   p=subprocess.Popen([str(ROOT/'peadb-server'),'--config',str(cfg)])
   try:
-   time.sleep(0.2)
-   with socket.create_connection(('127.0.0.1',6410),timeout=2) as s:
+   wait_ready(port,p)
+   with connect(port) as s:
     assert cmd(s,'SET','a','1')=='OK'
     assert cmd(s,'SAVE')=='OK'
     assert cmd(s,'BGSAVE')=='Background saving started'
@@ -58,7 +25,7 @@ def main():
     info=cmd(s,'INFO','persistence')
     assert 'rdb_last_save_time:' in info
   finally:
-   p.terminate(); p.wait(timeout=3)
+   stop(p)
  print('M5 persistence command tests passed')
  return 0
 
@@ -1,39 +1,14 @@
 #!/usr/bin/env python3
-import pathlib,socket,subprocess,time
+import pathlib
+from _respio import cmd, connect, free_port, start_server, stop, wait_ready
 ROOT=pathlib.Path(__file__).resolve().parents[2]
 
-def rx(s,n):
- b=b''
- while len(b)<n:
-  c=s.recv(n-len(b))
-  if not c: raise RuntimeError('closed')
-  b+=c
- return b
-
-def rl(s):
- b=b''
- while not b.endswith(b'\r\n'):
-  b+=rx(s,1)
- return b[:-2]
-
-def recv(s):
- p=rx(s,1)
- if p==b'+': return rl(s).decode()
- if p==b'-': return ('ERR',rl(s).decode())
- if p==b':': return int(rl(s))
- raise RuntimeError(p)
-
-def cmd(s,*a):
- d=f"*{len(a)}\r\n".encode()
- for x in a:
-  b=x.encode(); d+=f"${len(b)}\r\n".encode()+b+b"\r\n"
- s.sendall(d); return recv(s)
-
 def main():
- p=subprocess.Popen([str(ROOT/'peadb-server'),'--port','6426','--bind','127.0.0.1','--loglevel','error'])
+ port=free_port()
+ p=start_server(ROOT/'peadb-server',port)
  try:
-  time.sleep(0.2)
-  with socket.create_connection(('127.0.0.1',6426),timeout=2) as s:
+  wait_ready(port,p)
+  with connect(port) as s:
    a=cmd(s,'CLUSTER','KEYSLOT','foo{bar}x')
    b=cmd(s,'CLUSTER','KEYSLOT','zap{bar}y')
    c=cmd(s,'CLUSTER','KEYSLOT','plain')
@@ -43,7 +18,7 @@ def main():
   print('M7 keyslot tests passed')
   return 0
  finally:
-  p.terminate(); p.wait(timeout=3)
+  stop(p)
 
 if __name__=='__main__':
  raise SystemExit(main())
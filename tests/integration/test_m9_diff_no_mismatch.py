@@ -1,23 +1,15 @@
 #!/usr/bin/env python3
 import pathlib
-import shutil
 import subprocess
 import sys
 
-ROOT = pathlib.Path(__file__).resolve().parents[2]
-
+from _redis_path import skip_if_no_redis_server
 
-def _have_redis_server() -> bool:
-    local = ROOT / "third_party/redis/src/redis-server"
-    if local.exists():
-        return True
-    return shutil.which("redis-server") is not None
+ROOT = pathlib.Path(__file__).resolve().parents[2]
 
 
 def main():
-    if not _have_redis_server():
-        print("SKIP: redis-server not found (install redis-server or build third_party/redis)")
-        return 0
+    skip_if_no_redis_server()
     cmd = [sys.executable, str(ROOT / "tests" / "diff" / "run_diff_tests.py"), "--case", "tests/diff/basic/ping_echo_quit.json"]
     subprocess.check_call(cmd, cwd=ROOT)
     print("M9 differential no-mismatch tests passed")
@@ -2,16 +2,16 @@
 import pathlib
 
 ROOT = pathlib.Path(__file__).resolve().parents[2]
+NIGHTLY = ROOT / ".github" / "workflows" / "nightly.yml"
 
 
 def main():
-    wf = ROOT / ".github" / "workflows" / "nightly.yml"
-    if not wf.exists():
+    if not NIGHTLY.exists():
         print("M9 nightly workflow tests skipped (.github/workflows/nightly.yml not present)")
         return 0
-    txt = wf.read_text(encoding="utf-8")
-    assert "cron:" in txt
-    assert "tests/test_helper.tcl" in txt
+    txt = NIGHTLY.read_text(encoding="utf-8")
+    missing = [n for n in ("cron:", "tests/test_helper.tcl") if n not in txt]
+    assert not missing, f"nightly.yml lacks {missing}"
     assert "--single unit/" not in txt
     assert "artifacts" in txt.lower()
     print("M9 nightly workflow tests passed")
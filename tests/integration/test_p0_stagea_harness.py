@@ -6,10 +6,10 @@ ROOT = pathlib.Path(__file__).resolve().parents[2]
 
 def main():
     runner = (ROOT / "scripts" / "redis" / "run_redis_tests.sh").read_text(encoding="utf-8")
-    for suite in ["unit/keyspace", "unit/type/string", "unit/expire", "unit/multi", "unit/scripting"]:
-        assert suite in runner
-    assert "repro_commands.txt" in runner
-    assert "failed_suites.txt" in runner
+    needles = ["unit/keyspace", "unit/type/string", "unit/expire", "unit/multi", "unit/scripting",
+               "repro_commands.txt", "failed_suites.txt"]
+    missing = [n for n in needles if n not in runner]
+    assert not missing, f"run_redis_tests.sh lacks {missing}"
 
     ci_path = ROOT / ".github" / "workflows" / "ci.yml"
     if ci_path.exists():
@@ -19,9 +19,8 @@ def main():
         print("P0 note: .github/workflows/ci.yml not present, skipping CI workflow assertion")
 
     delta = (ROOT / "compat" / "delta.md").read_text(encoding="utf-8")
-    assert "- Owner:" in delta
-    assert "- Severity:" in delta
-    assert "- Target milestone:" in delta
+    missing = [n for n in ("- Owner:", "- Severity:", "- Target milestone:") if n not in delta]
+    assert not missing, f"compat/delta.md lacks {missing}"
     print("P0 stage-a harness tests passed")
     return 0
 
@@ -1,66 +1,17 @@
 #!/usr/bin/env python3
 import pathlib
-import socket
-import subprocess
-import time
 
-ROOT = pathlib.Path(__file__).resolve().parents[2]
-
-
-def rx(s, n):
-    b = b""
-    while len(b) < n:
-        c = s.recv(n - len(b))
-        if not c:
-            raise RuntimeError("closed")
-        b += c
-    return b
-
-
-def rl(s):
-    b = b""
-    while not b.endswith(b"\r\n"):
-        b += rx(s, 1)
-    return b[:-2]
+from _respio import cmd, connect, free_port, start_server, stop, wait_ready
 
-
-def recv(s):
-    p = rx(s, 1)
-    if p == b"+":
-        return rl(s).decode()
-    if p == b"-":
-        return ("ERR", rl(s).decode())
-    if p == b":":
-        return int(rl(s))
-    if p == b"$":
-        n = int(rl(s))
-        if n == -1:
-            return None
-        v = rx(s, n)
-        rx(s, 2)
-        return v.decode()
-    if p == b"*":
-        n = int(rl(s))
-        if n == -1:
-            return None
-        return [recv(s) for _ in range(n)]
-    raise RuntimeError(p)
-
-
-def cmd(s, *a):
-    d = f"*{len(a)}\r\n".encode()
-    for x in a:
-        b = x.encode()
-        d += f"${len(b)}\r\n".encode() + b + b"\r\n"
-    s.sendall(d)
-    return recv(s)
+ROOT = pathlib.Path(__file__).resolve().parents[2]
 
 
 def main():
-    p = subprocess.Popen([str(ROOT / "peadb-server"), "--port", "6464", "--bind", "127.0.0.1", "--loglevel", "error"])
+    port = free_port()
+    p = start_server(ROOT / "peadb-server", port)
     try:
-        time.sleep(0.2)
-        with socket.create_connection(("127.0.0.1", 6464), timeout=2) as s:
+        wait_ready(port, p)
+        with connect(port) as s:
             assert cmd(s, "FLUSHALL") == "OK"
             assert cmd(s, "SET", "src", "v1") == "OK"
             assert cmd(s, "COPY", "src", "dst") == 1
@@ -77,8 +28,7 @@ def main():
         print("P1 COPY/SPOP/TIME tests passed")
         return 0
     finally:
-        p.terminate()
-        p.wait(timeout=3)
+        stop(p)
 
 
 if __name__ == "__main__":
@@ -1,33 +1,27 @@
 #!/usr/bin/env python3
 import pathlib
-import shutil
 import subprocess
 import sys
 
-ROOT = pathlib.Path(__file__).resolve().parents[2]
-
+from _redis_path import skip_if_no_redis_server
+from _respio import free_port
 
-def _have_redis_server() -> bool:
-    local = ROOT / "third_party/redis/src/redis-server"
-    if local.exists():
-        return True
-    return shutil.which("redis-server") is not None
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+RUN_DIFF = str(ROOT / "tests" / "diff" / "run_diff_tests.py")
 
 
 def main():
-    if not _have_redis_server():
-        print("SKIP: redis-server not found (install redis-server or build third_party/redis)")
-        return 0
+    skip_if_no_redis_server()
     subprocess.check_call(
         [
             sys.executable,
-            str(ROOT / "tests" / "diff" / "run_diff_tests.py"),
+            RUN_DIFF,
             "--case",
             "tests/diff/basic/p1_keyspace_stagea.json",
             "--redis-port",
-            "6492",
+            str(free_port(shared=False)),
             "--peadb-port",
-            "6493",
+            str(free_port(shared=False)),
         ],
         cwd=ROOT,
     )
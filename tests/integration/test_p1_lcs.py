@@ -1,59 +1,9 @@
 #!/usr/bin/env python3
 import pathlib
-import socket
-import subprocess
-import time
 
-ROOT = pathlib.Path(__file__).resolve().parents[2]
-
-
-def rx(s, n):
-    b = b""
-    while len(b) < n:
-        c = s.recv(n - len(b))
-        if not c:
-            raise RuntimeError("closed")
-        b += c
-    return b
-
-
-def rl(s):
-    b = b""
-    while not b.endswith(b"\r\n"):
-        b += rx(s, 1)
-    return b[:-2]
+from _respio import connect, free_port, pipeline, start_server, stop, wait_ready
 
-
-def recv(s):
-    p = rx(s, 1)
-    if p == b"+":
-        return rl(s).decode()
-    if p == b"-":
-        return ("ERR", rl(s).decode())
-    if p == b":":
-        return int(rl(s))
-    if p == b"$":
-        n = int(rl(s))
-        if n == -1:
-            return None
-        v = rx(s, n)
-        rx(s, 2)
-        return v.decode()
-    if p == b"*":
-        n = int(rl(s))
-        if n == -1:
-            return None
-        return [recv(s) for _ in range(n)]
-    raise RuntimeError(p)
-
-
-def cmd(s, *a):
-    d = f"*{len(a)}\r\n".encode()
-    for x in a:
-        b = x.encode()
-        d += f"${len(b)}\r\n".encode() + b + b"\r\n"
-    s.sendall(d)
-    return recv(s)
+ROOT = pathlib.Path(__file__).resolve().parents[2]
 
 
 def to_dict(arr):
@@ -65,23 +15,26 @@ def to_dict(arr):
 
 
 def main():
-    p = subprocess.Popen([str(ROOT / "peadb-server"), "--port", "6478", "--bind", "127.0.0.1", "--loglevel", "error"])
+    port = free_port()
+    p = start_server(ROOT / "peadb-server", port)
     try:
-        time.sleep(0.2)
-        with socket.create_connection(("127.0.0.1", 6478), timeout=2) as s:
-            assert cmd(s, "FLUSHALL") == "OK"
-            assert cmd(s, "SET", "a", "ohmytext") == "OK"
-            assert cmd(s, "SET", "b", "mynewtext") == "OK"
-
-            assert cmd(s, "LCS", "a", "b") == "mytext"
-            assert cmd(s, "LCS", "a", "b", "LEN") == 6
+        wait_ready(port, p)
+        with connect(port) as s:
+            *replies, idx, idx_len = pipeline(s, [
+                ("FLUSHALL",),
+                ("SET", "a", "ohmytext"),
+                ("SET", "b", "mynewtext"),
+                ("LCS", "a", "b"),
+                ("LCS", "a", "b", "LEN"),
+                ("LCS", "a", "b", "IDX"),
+                ("LCS", "a", "b", "IDX", "WITHMATCHLEN", "MINMATCHLEN", "2"),
+            ])
+            assert replies == ["OK", "OK", "OK", "mytext", 6]
 
-            idx = cmd(s, "LCS", "a", "b", "IDX")
             d = to_dict(idx)
             assert d["len"] == 6
             assert isinstance(d["matches"], list) and len(d["matches"]) >= 1
 
-            idx_len = cmd(s, "LCS", "a", "b", "IDX", "WITHMATCHLEN", "MINMATCHLEN", "2")
             d2 = to_dict(idx_len)
             assert d2["len"] == 6
             for m in d2["matches"]:
@@ -90,8 +43,7 @@ def main():
         print("P1 LCS tests passed")
         return 0
     finally:
-        p.terminate()
-        p.wait(timeout=3)
+        stop(p)
 
 
 if __name__ == "__main__":
@@ -1,66 +1,46 @@
 #!/usr/bin/env python3
 import pathlib
-import socket
-import subprocess
-import time
+
+from _respio import connect, free_port, read_reply, start_server, stop, wait_ready
 
 ROOT = pathlib.Path(__file__).resolve().parents[2]
 
 
-def rx(s, n):
-    b = b""
-    while len(b) < n:
-        c = s.recv(n - len(b))
-        if not c:
-            raise RuntimeError("closed")
-        b += c
-    return b
+def recv(s):
+    # Bulk payloads are arbitrary bytes; latin-1 maps each one to a code point.
+    v = read_reply(s, raw=True)
+    return v.decode("latin1") if isinstance(v, bytes) else v
 
 
-def rl(s):
-    b = b""
-    while not b.endswith(b"\r\n"):
-        b += rx(s, 1)
-    return b[:-2]
+# latin-1 encodings of the arguments seen so far (command names, keys).
+_TOK = {}
 
 
-def recv(s):
-    p = rx(s, 1)
-    if p == b"+":
-        return rl(s).decode()
-    if p == b"-":
-        return ("ERR", rl(s).decode())
-    if p == b":":
-        return int(rl(s))
-    if p == b"$":
-        n = int(rl(s))
-        if n == -1:
-            return None
-        v = rx(s, n)
-        rx(s, 2)
-        return v.decode("latin1")
-    if p == b"*":
-        n = int(rl(s))
-        if n == -1:
-            return None
-        return [recv(s) for _ in range(n)]
-    raise RuntimeError(p)
+def _b(x):
+    v = _TOK.get(x)
+    if v is None:
+        v = _TOK[x] = x.encode("latin1")
+    return v
 
 
 def cmd(s, *a):
-    d = f"*{len(a)}\r\n".encode()
+    parts = [b"*%d\r\n" % len(a)]
+    ap = parts.append
     for x in a:
-        b = x.encode("latin1")
-        d += f"${len(b)}\r\n".encode() + b + b"\r\n"
-    s.sendall(d)
+        b = _b(x)
+        ap(b"$%d\r\n" % len(b))
+        ap(b)
+        ap(b"\r\n")
+    s.sendall(b"".join(parts))
     return recv(s)
 
 
 def main():
-    p = subprocess.Popen([str(ROOT / "peadb-server"), "--port", "6470", "--bind", "127.0.0.1", "--loglevel", "error"])
+    port = free_port()
+    p = start_server(ROOT / "peadb-server", port)
     try:
-        time.sleep(0.2)
-        with socket.create_connection(("127.0.0.1", 6470), timeout=2) as s:
+        wait_ready(port, p)
+        with connect(port) as s:
             assert cmd(s, "FLUSHALL") == "OK"
 
             # Non-existing key behavior.
@@ -100,8 +80,7 @@ def main():
         print("P1 string range tests passed")
         return 0
     finally:
-        p.terminate()
-        p.wait(timeout=3)
+        stop(p)
 
 
 if __name__ == "__main__":
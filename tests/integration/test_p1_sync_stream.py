@@ -1,35 +1,22 @@
 #!/usr/bin/env python3
 import pathlib
-import socket
-import subprocess
 import time
 
+from _respio import connect, encode_command, free_port, read_rdb, reader, start_server, stop, wait_ready
+
 ROOT = pathlib.Path(__file__).resolve().parents[2]
 
 
 def send_cmd(sock, *a):
-    d = f"*{len(a)}\r\n".encode()
-    for x in a:
-        b = x.encode()
-        d += f"${len(b)}\r\n".encode() + b + b"\r\n"
-    sock.sendall(d)
+    sock.sendall(encode_command(a))
 
 
 def rx(s, n):
-    b = b""
-    while len(b) < n:
-        c = s.recv(n - len(b))
-        if not c:
-            raise RuntimeError("closed")
-        b += c
-    return b
+    return reader(s).read_exact(n)
 
 
 def read_line(s):
-    b = b""
-    while not b.endswith(b"\r\n"):
-        b += rx(s, 1)
-    return b[:-2]
+    return reader(s).read_line()
 
 
 def read_bulk_reply(s):
@@ -61,18 +48,18 @@ def parse_repl_cmd(s):
 
 
 def main():
-    p = subprocess.Popen([str(ROOT / "peadb-server"), "--port", "6468", "--bind", "127.0.0.1", "--loglevel", "error"])
+    port = free_port(shared=False)
+    p = start_server(ROOT / "peadb-server", port)
     try:
-        time.sleep(0.2)
-        with socket.create_connection(("127.0.0.1", 6468), timeout=2) as c, socket.create_connection(("127.0.0.1", 6468), timeout=2) as r:
+        wait_ready(port, p)
+        with connect(port) as c, connect(port) as r:
             send_cmd(c, "FLUSHALL")
             assert read_bulk_reply.__name__
             assert rx(c, 1) == b"+"
             read_line(c)
 
             r.sendall(b"SYNC\r\n")
-            assert rx(r, 1) == b"$"
-            assert read_line(r) == b"0"
+            assert read_rdb(r) == b""
 
             send_cmd(c, "SET", "foo", "bar")
             assert rx(c, 1) == b"+"
@@ -93,8 +80,7 @@ def main():
         print("P1 SYNC stream tests passed")
         return 0
     finally:
-        p.terminate()
-        p.wait(timeout=3)
+        stop(p)
 
 
 if __name__ == "__main__":
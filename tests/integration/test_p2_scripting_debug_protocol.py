@@ -1,35 +1,22 @@
 #!/usr/bin/env python3
 import pathlib
 import socket
-import subprocess
-import time
+
+from _respio import connect, encode_command, free_port, reader, start_server, stop, wait_ready
 
 ROOT = pathlib.Path(__file__).resolve().parents[2]
 
 
 def enc(*args: str) -> bytes:
-    out = f"*{len(args)}\r\n".encode()
-    for a in args:
-        b = a.encode()
-        out += f"${len(b)}\r\n".encode() + b + b"\r\n"
-    return out
+    return encode_command(args)
 
 
 def rx(sock: socket.socket, n: int) -> bytes:
-    buf = b""
-    while len(buf) < n:
-        chunk = sock.recv(n - len(buf))
-        if not chunk:
-            raise RuntimeError("connection closed")
-        buf += chunk
-    return buf
+    return reader(sock).read_exact(n)
 
 
 def rl(sock: socket.socket) -> bytes:
-    b = b""
-    while not b.endswith(b"\r\n"):
-        b += rx(sock, 1)
-    return b[:-2]
+    return reader(sock).read_line()
 
 
 def read_reply(sock: socket.socket):
@@ -110,13 +97,11 @@ def eval_head(sock: socket.socket, script: str):
 
 
 def main() -> int:
-    port = 6505
-    proc = subprocess.Popen(
-        [str(ROOT / "peadb-server"), "--port", str(port), "--bind", "127.0.0.1", "--loglevel", "error"]
-    )
+    port = free_port(shared=False)
+    proc = start_server(ROOT / "peadb-server", port)
     try:
-        time.sleep(0.25)
-        with socket.create_connection(("127.0.0.1", port), timeout=2) as s:
+        wait_ready(port, proc)
+        with connect(port) as s:
             assert cmd(s, "DEBUG", "SET-DISABLE-DENY-SCRIPTS", "1")[1] == "OK"
 
             big = "1234567999999999999999999999999999999"
@@ -182,8 +167,7 @@ def main() -> int:
         print("P2 scripting debug-protocol matrix tests passed")
         return 0
     finally:
-        proc.terminate()
-        proc.wait(timeout=3)
+        stop(proc)
 
 
 if __name__ == "__main__":
@@ -1,74 +1,11 @@
 #!/usr/bin/env python3
 import pathlib
 import socket
-import subprocess
 import time
 
-ROOT = pathlib.Path(__file__).resolve().parents[2]
-
-
-def enc(*args: str) -> bytes:
-    out = f"*{len(args)}\r\n".encode()
-    for a in args:
-        b = a.encode()
-        out += f"${len(b)}\r\n".encode() + b + b"\r\n"
-    return out
-
-
-def rx(sock: socket.socket, n: int) -> bytes:
-    b = b""
-    while len(b) < n:
-        c = sock.recv(n - len(b))
-        if not c:
-            raise RuntimeError("closed")
-        b += c
-    return b
-
+from _respio import cmd, connect, free_port, start_server, stop, wait_ready
 
-def rl(sock: socket.socket) -> bytes:
-    b = b""
-    while not b.endswith(b"\r\n"):
-        b += rx(sock, 1)
-    return b[:-2]
-
-
-def recv(sock: socket.socket):
-    p = rx(sock, 1)
-    if p == b"+":
-        return rl(sock).decode()
-    if p == b"-":
-        return ("ERR", rl(sock).decode())
-    if p == b":":
-        return int(rl(sock))
-    if p == b"$":
-        n = int(rl(sock))
-        if n == -1:
-            return None
-        d = rx(sock, n)
-        rx(sock, 2)
-        return d.decode()
-    if p == b"*":
-        n = int(rl(sock))
-        if n == -1:
-            return None
-        return [recv(sock) for _ in range(n)]
-    if p == b"%":
-        n = int(rl(sock))
-        m = {}
-        for _ in range(n):
-            k = recv(sock)
-            v = recv(sock)
-            m[k] = v
-        return m
-    if p == b"_":
-        rl(sock)
-        return None
-    raise RuntimeError(f"prefix {p!r}")
-
-
-def cmd(sock: socket.socket, *args: str):
-    sock.sendall(enc(*args))
-    return recv(sock)
+ROOT = pathlib.Path(__file__).resolve().parents[2]
 
 
 def load_one_function(sock: socket.socket, body: str) -> None:
@@ -87,11 +24,11 @@ def fcall(sock: socket.socket, numkeys: int, *keys: str):
 
 
 def main() -> int:
-    port = 6506
-    p = subprocess.Popen([str(ROOT / "peadb-server"), "--port", str(port), "--bind", "127.0.0.1", "--loglevel", "error"])
+    port = free_port(shared=False)
+    p = start_server(ROOT / "peadb-server", port)
     try:
-        time.sleep(0.25)
-        with socket.create_connection(("127.0.0.1", port), timeout=2) as s:
+        wait_ready(port, p)
+        with connect(port) as s:
             assert cmd(s, "DEBUG", "SET-DISABLE-DENY-SCRIPTS", "1") == "OK"
 
             load_one_function(
@@ -126,8 +63,7 @@ def main() -> int:
         print("P2 scripting time-freeze tests passed")
         return 0
     finally:
-        p.terminate()
-        p.wait(timeout=3)
+        stop(p)
 
 
 if __name__ == "__main__":
@@ -1,69 +1,18 @@
 #!/usr/bin/env python3
 """Tests for HINCRBY, HINCRBYFLOAT, HKEYS, HMGET, HMSET, HSETNX, HVALS."""
 import pathlib
-import socket
-import subprocess
-import time
-
-ROOT = pathlib.Path(__file__).resolve().parents[2]
 
+from _respio import cmd, connect, free_port, start_server, stop, wait_ready
 
-def read_exact(s: socket.socket, n: int) -> bytes:
-    b = bytearray()
-    while len(b) < n:
-        c = s.recv(n - len(b))
-        if not c:
-            raise RuntimeError("closed")
-        b.extend(c)
-    return bytes(b)
-
-
-def read_line(s: socket.socket) -> bytes:
-    b = bytearray()
-    while True:
-        b.extend(read_exact(s, 1))
-        if b[-2:] == b"\r\n":
-            return bytes(b[:-2])
-
-
-def recv(s: socket.socket):
-    p = read_exact(s, 1)
-    if p == b"+":
-        return read_line(s).decode()
-    if p == b"-":
-        return ("ERR", read_line(s).decode())
-    if p == b":":
-        return int(read_line(s).decode())
-    if p == b"$":
-        n = int(read_line(s).decode())
-        if n == -1:
-            return None
-        b = read_exact(s, n)
-        read_exact(s, 2)
-        return b.decode()
-    if p == b"*":
-        n = int(read_line(s).decode())
-        if n == -1:
-            return None
-        return [recv(s) for _ in range(n)]
-    raise RuntimeError(p)
-
-
-def cmd(s: socket.socket, *args: str):
-    data = f"*{len(args)}\r\n".encode()
-    for a in args:
-        b = a.encode()
-        data += f"${len(b)}\r\n".encode() + b + b"\r\n"
-    s.sendall(data)
-    return recv(s)
+ROOT = pathlib.Path(__file__).resolve().parents[2]
 
 
 def main() -> int:
-    proc = subprocess.Popen([str(ROOT / "peadb-server"), "--port", "6520",
-                             "--bind", "127.0.0.1", "--loglevel", "error"])
+    port = free_port(shared=False)
+    proc = start_server(ROOT / "peadb-server", port)
     try:
-        time.sleep(0.2)
-        with socket.create_connection(("127.0.0.1", 6520), timeout=2) as s:
+        wait_ready(port, proc)
+        with connect(port) as s:
             assert cmd(s, "FLUSHALL") == "OK"
 
             # ── HMSET / HMGET ────────────────────────────────────
@@ -128,8 +77,7 @@ def main() -> int:
         print("P3 hash extras tests passed")
         return 0
     finally:
-        proc.terminate()
-        proc.wait(timeout=3)
+        stop(proc)
 
 
 if __name__ == "__main__":